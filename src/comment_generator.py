@@ -1,56 +1,407 @@
 import anthropic
+import asyncio
+import functools
+import httpx
+import json
+import logging
+import random
 import re
-import time
-from typing import Dict, Any, List, Union
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from config import Config
-from java_parser import JavaElement
+from java_parser import JavaElement, split_parameters
+from message_batches import RETRYABLE_STATUS_CODES, MessageBatches
+from rate_limiter import TokenBucket
+from response_cache import ResponseCache, cached_response
+
+logger = logging.getLogger(__name__)
+
+# 메소드 시그니처 패턴 (반환 타입, 이름, 파라미터, 예외) - 파라미터 애노테이션의 괄호 인자 포함
+_METHOD_SIG_RE = re.compile(
+    r'(?:public|private|protected)?\s*'
+    r'(?:static\s+)?(?:final\s+)?(?:synchronized\s+)?'
+    r'(?:abstract\s+)?'
+    r'(?P<return_type>\w+(?:<[^>]*>)?(?:\[\])?)\s+'
+    r'(?P<method_name>\w+)\s*\('
+    r'(?P<parameters>(?:[^()]|\((?:[^()]|\([^()]*\))*\))*)'
+    r'\)\s*(?:throws\s+(?P<exceptions>[\w\s,]+))?',
+    re.MULTILINE | re.DOTALL
+)
+
+# 필드 선언 패턴 (타입, 초기값)
+_FIELD_DECL_RE = re.compile(r'(\w+(?:<[^>]*>)?(?:\[\])?)\s+\w+(?:\s*=\s*([^;]+))?;')
+
+# 필드 선언의 단어 토큰 (제한자 확인용)
+_WORD_RE = re.compile(r'\w+')
+
+# JavaDoc 여닫는 기호 (/** 와 */)
+_JAVADOC_FENCE_RE = re.compile(r'^\s*/\*\*|\*/\s*$')
+
+# JavaDoc 본문 한 줄 (앞쪽 공백과 '*', 뒤쪽 공백을 제외한 내용)
+_COMMENT_LINE_RE = re.compile(r'^[ \t]*\*?[ \t]*(.*?)[ \t\r]*$', re.MULTILINE)
+
+# 내용이 정해져 있는 메소드는 API 호출 없이 고정 주석 사용
+# 메소드명: (반환 타입, 파라미터 수, 주석 템플릿 - {0}은 첫 번째 파라미터명)
+CANNED_METHOD_COMMENTS = {
+    'toString': ('String', 0, """/**
+ * 객체의 문자열 표현을 반환합니다.
+ *
+ * @return 객체의 상태를 나타내는 문자열
+ */"""),
+    'hashCode': ('int', 0, """/**
+ * 객체의 해시 코드를 반환합니다.
+ *
+ * @return 객체의 해시 코드 값
+ */"""),
+    'equals': ('boolean', 1, """/**
+ * 주어진 객체가 이 객체와 같은지 비교합니다.
+ *
+ * @param {0} 비교할 객체
+ * @return 두 객체가 같으면 true, 다르면 false
+ */"""),
+    'compareTo': ('int', 1, """/**
+ * 주어진 객체와 순서를 비교합니다.
+ *
+ * @param {0} 비교할 객체
+ * @return 이 객체가 작으면 음수, 같으면 0, 크면 양수
+ */"""),
+    'main': ('void', 1, """/**
+ * 애플리케이션의 진입점입니다.
+ *
+ * @param {0} 명령행 인자
+ */"""),
+}
+
+# 프롬프트나 응답 처리 방식이 바뀌면 올려서 이전 실행의 파일 캐시를 무효화
+PROMPT_VERSION = 1
+
+# 필드는 짧은 한 줄 주석이므로 토큰 수를 작게 제한
+FIELD_MAX_TOKENS = 200
+
+# 묶음 요청은 요소 수에 비례해 토큰 수를 정하되 모델의 최대 출력 토큰 수를 넘지 않도록 제한
+BATCH_TOKENS_PER_ELEMENT = 600
+BATCH_MAX_TOKENS = 8192
+
+# 모든 요청에 공통으로 들어가는 지시문은 system 블록으로 분리해 프롬프트 캐싱 대상으로 지정
+STATIC_CLASS_INSTRUCTIONS = """주어지는 Java 클래스에 대한 JavaDoc 주석을 생성해주세요.
+
+요구사항:
+1. 클래스의 주요 목적과 책임을 첫 줄에 명확하게 설명
+2. 두 번째 줄부터 핵심 기능과 사용 목적을 설명
+3. 필요한 경우에만 @throws 태그 포함
+4. 설명과 태그 사이에 빈 줄 추가
+5. 각 줄은 ' * '로 시작
+6. 한국어로 작성
+7. JavaDoc 표준 형식 준수
+
+예시:
+/**
+ * 클래스의 주요 목적을 한 줄로 설명합니다.
+ * 클래스의 핵심 기능과 사용 목적을 설명합니다.
+ * 
+ * @throws ExceptionType 예외 발생 조건 (필요한 경우만)
+ */
+
+주석만 반환해주세요."""
+
+STATIC_METHOD_INSTRUCTIONS = """주어지는 Java 메소드에 대한 완전한 JavaDoc 주석을 생성해주세요.
+
+요구사항:
+1. 메소드의 핵심 목적을 첫 줄에 명확하고 간결하게 설명
+2. 두 번째 줄부터 구체적인 동작 방식과 제약사항 설명
+3. 모든 파라미터에 대해 @param 태그로 상세 설명
+4. 반환값이 있으면 @return 태그로 상세 설명
+5. 발생 가능한 예외는 @throws 태그로 구체적인 발생 조건 설명
+6. 설명과 태그 사이에 빈 줄 추가
+7. 각 줄은 ' * '로 시작
+8. 한국어로 작성
+9. JavaDoc 표준 형식 준수
+
+예시:
+/**
+ * 메소드의 핵심 기능을 한 줄로 설명합니다.
+ * 구체적인 동작 방식과 처리 과정을 설명합니다.
+ * 
+ * @param paramName 파라미터에 대한 상세한 설명
+ * @return 반환값에 대한 상세한 설명
+ * @throws ExceptionType 예외 발생 조건
+ */
+
+주석만 반환해주세요."""
+
+STATIC_FIELD_INSTRUCTIONS = """주어지는 Java 필드에 대한 간단한 주석을 생성해주세요.
+
+요구사항:
+1. 한 줄 주석(//) 형식
+2. 필드의 구체적인 용도와 의미 설명
+3. 한국어로 작성
+4. 필드명만 반복하는 설명 금지
+
+예시:
+// 사용자 인증 상태를 저장하는 플래그
+
+주석만 반환해주세요."""
+
+STATIC_BATCH_INSTRUCTIONS = """주어지는 Java 파일 코드와 요소 목록을 보고 각 요소에 대한 주석을 생성해주세요.
+코드의 각 줄 앞에는 라인 번호가 붙어 있고, 요소 목록에는 id, 종류, 이름, 선언 라인, 선언부가 있습니다.
+
+요구사항:
+1. class, interface, enum, method 요소는 JavaDoc 형식
+   - 핵심 목적을 첫 줄에 명확하고 간결하게 설명
+   - 두 번째 줄부터 구체적인 동작 방식과 제약사항 설명
+   - 메소드의 모든 파라미터는 @param, 반환값은 @return, 발생 가능한 예외는 @throws 태그로 설명
+   - 설명과 태그 사이에 빈 줄 추가
+   - 각 줄은 ' * '로 시작
+2. field 요소는 한 줄 주석(//) 형식으로 필드의 구체적인 용도와 의미 설명 (필드명만 반복하는 설명 금지)
+3. 한국어로 작성
+4. JavaDoc 표준 형식 준수
+
+응답 형식:
+요소 id를 키로, 주석 문자열을 값으로 하는 JSON 객체만 반환해주세요.
+
+예시:
+{"0": "/**\\n * 메소드의 핵심 기능을 한 줄로 설명합니다.\\n * 구체적인 동작 방식과 처리 과정을 설명합니다.\\n *\\n * @param paramName 파라미터에 대한 상세한 설명\\n * @return 반환값에 대한 상세한 설명\\n */", "1": "// 사용자 인증 상태를 저장하는 플래그"}"""
+
+def _context_window(context_lines: List[str]) -> Callable[[int, int], str]:
+    """파일 라인 목록에서 [시작, 끝) 구간의 코드를 반환하는 함수 생성 (같은 구간은 한 번만 join)"""
+    @functools.lru_cache(maxsize=None)
+    def window(start_line: int, end_line: int) -> str:
+        return ''.join(context_lines[max(0, start_line):min(len(context_lines), end_line)])
+    return window
 
 class CommentGenerator:
     def __init__(self, config):
         self.config = config
-        # 0.18.1 버전에서는 anthropic.Client가 맞음
-        self.client = anthropic.Client(api_key=config.ANTHROPIC_API_KEY)
+        # 요청별 타임아웃 (SDK 기본값 600초 대신 명시적으로 지정해 멈춘 연결이 세마포어를 붙잡지 않도록 함)
+        self.request_timeout = httpx.Timeout(config.REQUEST_TIMEOUT, connect=config.CONNECT_TIMEOUT)
+        # 모든 요청이 TCP/TLS 연결을 재사용하도록 HTTP/2 연결 풀을 하나만 생성
+        self.http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            timeout=self.request_timeout
+        )
+        # 요청을 동시에 보내기 위해 비동기 클라이언트 사용
+        # 재시도는 _call_claude_api에서 직접 처리하므로 SDK 자체 재시도는 끔
+        self.client = anthropic.AsyncAnthropic(
+            api_key=config.ANTHROPIC_API_KEY,
+            max_retries=0,
+            http_client=self.http_client
+        )
+        # 동시 API 요청 수 제한
+        self.semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY)
+        # 429 응답을 미리 피하기 위한 클라이언트 측 요청 속도 제한
+        self.rate_limiter = TokenBucket(config.REQUESTS_PER_SECOND, config.REQUEST_BURST)
+        # 동일한 프롬프트의 응답을 재사용하기 위한 디스크 캐시
+        self.response_cache = ResponseCache(config.RESPONSE_CACHE_PATH) if config.USE_RESPONSE_CACHE else None
+        # Message Batches로 미리 받아 둔 응답 (캐시 키 -> 응답 텍스트)
+        self.prefetched = {}
         self.max_retries = 5
         self.retry_delay = 15
         self.retry_multiplier = 2
     
-    def generate_comment(self, element: JavaElement, file_context: Union[str, List[str]] = None) -> str:
-        """Java 요소에 대한 주석 생성"""
+    async def aclose(self) -> None:
+        """HTTP 연결 풀과 응답 캐시 연결 정리"""
+        await self.client.close()
+        if self.response_cache is not None:
+            self.response_cache.close()
+    
+    async def generate_comments(self, elements: List[JavaElement],
+                                context_lines: List[str]) -> List[Optional[str]]:
+        """파일의 요소들을 묶어서 요청 단위로 주석 생성 (elements 순서대로, API 호출에 실패한 요소는 None)"""
+        comments, batches = self._split_batches(elements)
+        window = _context_window(context_lines)
         
+        results = await asyncio.gather(*[
+            self._generate_batch_comments(batch, context_lines, window)
+            for batch in batches
+        ])
+        generated = iter([comment for batch_comments in results for comment in batch_comments])
+        return [comment if comment is not None else next(generated) for comment in comments]
+    
+    async def _request_comment(self, element: JavaElement, window: Callable[[int, int], str]) -> Optional[str]:
+        """요소 하나의 주석을 개별 요청으로 생성 (API 호출에 실패하면 None)"""
         if element.type in ['class', 'interface', 'enum']:
-            return self._generate_class_comment(element, file_context)
+            return await self._generate_class_comment(element, window)
         elif element.type == 'method':
-            return self._generate_method_comment(element, file_context)
+            return await self._generate_method_comment(element, window)
         elif element.type == 'field':
-            return self._generate_field_comment(element, file_context)
+            return await self._generate_field_comment(element, window)
         else:
             return ""
     
-    def _prepare_context(self, context: Union[str, List[str]]) -> List[str]:
-        """컨텍스트를 라인 리스트로 변환"""
-        if context is None:
-            return []
-        elif isinstance(context, str):
-            return context.split('\n')
-        elif isinstance(context, list):
-            return context
-        else:
-            return []
+    def plan_requests(self, elements: List[JavaElement],
+                      context_lines: List[str]) -> List[Tuple[str, str, Optional[int]]]:
+        """generate_comments가 보낼 요청들을 (system, prompt, max_tokens) 목록으로 반환"""
+        _, batches = self._split_batches(elements)
+        window = _context_window(context_lines)
+        
+        requests = []
+        for batch in batches:
+            if len(batch) == 1:
+                request = self._element_request(batch[0], window)
+                if request is not None:
+                    requests.append(request)
+            else:
+                requests.append((
+                    STATIC_BATCH_INSTRUCTIONS,
+                    self._build_batch_prompt(batch, context_lines),
+                    self._batch_max_tokens(batch)
+                ))
+        return requests
     
-    def _extract_method_signature(self, method_content: str) -> Dict[str, Any]:
-        """메소드 시그니처에서 상세 정보 추출"""
-        method_pattern = re.compile(
-            r'(?:public|private|protected)?\s*'
-            r'(?:static\s+)?(?:final\s+)?(?:synchronized\s+)?'
-            r'(?:abstract\s+)?'
-            r'(?P<return_type>\w+(?:<[^>]*>)?(?:\[\])?)\s+'
-            r'(?P<method_name>\w+)\s*\('
-            r'(?P<parameters>[^)]*)'
-            r'\)\s*(?:throws\s+(?P<exceptions>[\w\s,]+))?',
-            re.MULTILINE | re.DOTALL
+    async def prefetch(self, requests: List[Tuple[str, str, Optional[int]]],
+                       on_progress: Optional[Callable[[Dict[str, int]], None]] = None) -> None:
+        """요청들을 Message Batches 작업 하나로 미리 처리해 결과를 응답 캐시에 채움
+
+        이후 같은 요청은 _call_claude_api에서 API 호출 없이 바로 반환된다.
+        배치 작업이 실패하면 경고만 남기고, 해당 요청은 평소처럼 개별 호출로 처리된다.
+        """
+        pending = {}
+        for system_prompt, prompt, max_tokens in requests:
+            key = self._cache_key(system_prompt, prompt, max_tokens)
+            if key in pending or key in self.prefetched:
+                continue
+            if self.response_cache is not None and self.response_cache.get(key) is not None:
+                continue
+            # 캐시 키(SHA-256 hex, 64자)를 custom_id로 사용해 결과를 바로 캐시에 매핑
+            pending[key] = self._message_params(system_prompt, prompt, max_tokens)
+        
+        if not pending:
+            return
+        
+        try:
+            batches = MessageBatches(self.client, self.config, self.max_retries, self._get_retry_wait)
+            results = await batches.run(pending, on_progress)
+        except (anthropic.APIError, KeyError, ValueError) as e:
+            logger.warning("배치 처리 중 오류 발생, 개별 요청으로 진행합니다: %s", e)
+            return
+        
+        for key, text in results.items():
+            self.prefetched[key] = text
+            if self.response_cache is not None:
+                self.response_cache.set(key, text)
+    
+    def _split_batches(self, elements: List[JavaElement]) -> Tuple[List[Optional[str]], List[List[JavaElement]]]:
+        """고정 주석 목록(요청이 필요한 요소는 None)과 요청 단위로 묶은 나머지 요소 반환"""
+        # 고정 주석이 있는 요소는 묶음에서 빼고 나머지만 요청
+        comments = [self._canned_comment(element) for element in elements]
+        pending = [element for element, comment in zip(elements, comments) if comment is None]
+        
+        batch_size = self.config.BATCH_ELEMENTS_PER_REQUEST
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        return comments, batches
+    
+    def _canned_comment(self, element: JavaElement) -> Optional[str]:
+        """toString, equals 등 내용이 정해진 메소드의 고정 주석 반환 (해당 없으면 None)"""
+        if element.type != 'method' or element.name not in CANNED_METHOD_COMMENTS:
+            return None
+        
+        return_type, param_count, template = CANNED_METHOD_COMMENTS[element.name]
+        method_info = self._extract_method_signature(element.content)
+        params = method_info.get('parameters', [])
+        # 같은 이름이라도 시그니처가 다른 오버로드는 일반 요청으로 처리
+        if method_info.get('return_type') != return_type or len(params) != param_count:
+            return None
+        
+        return template.format(*[param['name'] for param in params])
+    
+    async def _generate_batch_comments(self, elements: List[JavaElement], context_lines: List[str],
+                                       window: Callable[[int, int], str]) -> List[Optional[str]]:
+        """요소 묶음의 주석을 요청 하나로 생성 - 응답에 빠지거나 잘못된 요소는 개별 요청으로 보완
+
+        API 호출에 실패한 요소의 주석은 None으로 반환한다.
+        """
+        if len(elements) == 1:
+            return [await self._request_comment(elements[0], window)]
+        
+        prompt = self._build_batch_prompt(elements, context_lines)
+        # 잘려서 JSON으로 읽을 수 없는 응답은 캐시하지 않음 (캐시에 남아 있던 것도 무시하고 다시 요청)
+        response = await self._call_claude_api(
+            STATIC_BATCH_INSTRUCTIONS,
+            prompt,
+            max_tokens=self._batch_max_tokens(elements),
+            is_valid=lambda text: bool(self._parse_batch_response(text))
         )
+        if response is None:
+            # 재시도를 모두 소진한 경우 - 요소별로 다시 보내도 같은 재시도를 반복하므로 바로 실패 처리
+            return [None] * len(elements)
+        comments = self._parse_batch_response(response)
+        
+        results = []
+        missing = []
+        for index, element in enumerate(elements):
+            comment = comments.get(str(index))
+            if not isinstance(comment, str) or not comment.strip():
+                missing.append(index)
+                results.append(None)
+            elif element.type == 'field':
+                results.append(self._format_field_comment(comment))
+            else:
+                results.append(self._format_comment(comment))
+        
+        if missing:
+            fallback = await asyncio.gather(*[
+                self._request_comment(elements[index], window)
+                for index in missing
+            ])
+            for index, comment in zip(missing, fallback):
+                results[index] = comment
+        
+        return results
+    
+    def _batch_max_tokens(self, elements: List[JavaElement]) -> int:
+        """요소 묶음 요청의 최대 토큰 수"""
+        return min(BATCH_TOKENS_PER_ELEMENT * len(elements), BATCH_MAX_TOKENS)
+    
+    def _build_batch_prompt(self, elements: List[JavaElement], context_lines: List[str]) -> str:
+        """요소 묶음용 프롬프트 생성 - 요소들이 걸친 코드 구간을 한 번만 포함"""
+        first_line = min(element.line_number for element in elements) - 1
+        last_line = max(element.line_number for element in elements) - 1
+        start_line = max(0, first_line - 10)
+        end_line = min(len(context_lines), last_line + 20)
+        code = ''.join(
+            f"{number}: {line}"
+            for number, line in enumerate(context_lines[start_line:end_line], start_line + 1)
+        )
+        
+        element_list = [
+            {
+                'id': str(index),
+                'type': element.type,
+                'name': element.name,
+                'line': element.line_number,
+                'declaration': element.content
+            }
+            for index, element in enumerate(elements)
+        ]
+        
+        return f"""파일 코드:
+{code}
+요소 목록:
+{json.dumps(element_list, ensure_ascii=False, indent=2)}"""
+    
+    def _parse_batch_response(self, response: str) -> Dict[str, Any]:
+        """JSON 응답에서 {요소 id: 주석} 추출 (실패 시 빈 dict)"""
+        if not response:
+            return {}
+        
+        # 코드 블록 등으로 감싸진 경우 JSON 객체 부분만 사용
+        start = response.find('{')
+        end = response.rfind('}')
+        if start == -1 or end < start:
+            return {}
         
-        match = method_pattern.search(method_content)
+        try:
+            comments = json.loads(response[start:end + 1])
+        except ValueError:
+            return {}
+        return comments if isinstance(comments, dict) else {}
+    
+    def _extract_method_signature(self, method_content: str) -> Dict[str, Any]:
+        """메소드 시그니처에서 상세 정보 추출"""
+        match = _METHOD_SIG_RE.search(method_content)
         if not match:
             return {}
         
@@ -64,16 +415,7 @@ class CommentGenerator:
         # 파라미터 파싱
         params_str = match.group('parameters')
         if params_str and params_str.strip():
-            params = [p.strip() for p in params_str.split(',')]
-            for param in params:
-                parts = param.split()
-                if len(parts) >= 2:
-                    param_type = ' '.join(parts[:-1])
-                    param_name = parts[-1]
-                    result['parameters'].append({
-                        'type': param_type,
-                        'name': param_name
-                    })
+            result['parameters'] = split_parameters(params_str)
         
         # 예외 파싱
         exceptions_str = match.group('exceptions')
@@ -82,64 +424,117 @@ class CommentGenerator:
         
         return result
     
-    def _call_claude_api(self, prompt: str, retry_count: int = 0) -> str:
-        """Claude API 호출 with 재시도 로직 - 0.18.1 버전용"""
-        try:
-            # 0.18.1 버전의 API 호출 방식
-            response = self.client.messages.create(
-                model=self.config.MODEL,
-                max_tokens=self.config.MAX_TOKENS,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            )
-            
-            # 0.18.1 버전에서의 응답 처리
-            print(f"디버깅 - Claude API 응답: {type(response)}")
-            print(f"디버깅 - Response attributes: {dir(response)}")
+    def _cache_key(self, system_prompt: str, prompt: str, max_tokens: Optional[int]) -> str:
+        """요청 하나를 식별하는 캐시 키"""
+        return ResponseCache.make_key(
+            self.config.MODEL,
+            max_tokens or self.config.MAX_TOKENS,
+            system_prompt,
+            prompt
+        )
+    
+    def _message_params(self, system_prompt: str, prompt: str, max_tokens: Optional[int]) -> Dict[str, Any]:
+        """messages.create와 배치 요청에 공통으로 쓰는 파라미터"""
+        return {
+            "model": self.config.MODEL,
+            "max_tokens": max_tokens or self.config.MAX_TOKENS,
+            # 고정 지시문은 캐시 가능한 system 블록으로, 요소별 코드만 user 메시지로 전송
+            "system": [
+                {
+                    "type": "text",
+                    "text": system_prompt,
+                    "cache_control": {"type": "ephemeral"}
+                }
+            ],
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        }
+    
+    @cached_response
+    async def _call_claude_api(self, system_prompt: str, prompt: str, max_tokens: int = None) -> str:
+        """Claude API 호출 with 재시도 로직 - 응답 텍스트 반환, 실패 시 None"""
+        for attempt in range(self.max_retries):
+            await self.rate_limiter.acquire()
+            try:
+                # 0.18.1 버전의 API 호출 방식
+                async with self.semaphore:
+                    response = await self.client.messages.create(
+                        **self._message_params(system_prompt, prompt, max_tokens),
+                        timeout=self.request_timeout
+                    )
+            except anthropic.APIStatusError as e:
+                logger.warning("API 호출 중 오류 발생 (시도 %d/%d): %s", attempt + 1, self.max_retries, e)
+                retryable = isinstance(e, anthropic.RateLimitError) or e.status_code in RETRYABLE_STATUS_CODES
+                if not retryable or attempt == self.max_retries - 1:
+                    return None
+                wait_time = self._get_retry_wait(e, attempt)
+                logger.warning("%.1f초 후 재시도합니다...", wait_time)
+                await asyncio.sleep(wait_time)
+                continue
+            except anthropic.APIConnectionError as e:
+                # 타임아웃(APITimeoutError)과 연결 오류는 일시적인 문제로 보고 재시도
+                logger.warning("API 연결 오류 발생 (시도 %d/%d): %s", attempt + 1, self.max_retries, e)
+                if attempt == self.max_retries - 1:
+                    return None
+                wait_time = self._get_retry_wait(e, attempt)
+                logger.warning("%.1f초 후 재시도합니다...", wait_time)
+                await asyncio.sleep(wait_time)
+                continue
+            except Exception as e:
+                logger.warning("API 호출 중 오류 발생: %s", e)
+                return None
             
-            # 다양한 응답 형식 처리
-            comment = ""
-            if hasattr(response, 'content'):
-                if isinstance(response.content, list):
-                    # ContentBlock 리스트인 경우
-                    for block in response.content:
-                        if hasattr(block, 'text'):
-                            comment += block.text
-                        elif hasattr(block, 'content'):
-                            comment += str(block.content)
-                        else:
-                            comment += str(block)
-                elif hasattr(response.content, 'text'):
-                    # 단일 ContentBlock인 경우
-                    comment = response.content.text
-                else:
-                    # 문자열인 경우
-                    comment = str(response.content)
-            else:
-                # response 자체가 텍스트인 경우
-                comment = str(response)
+            if getattr(response, 'stop_reason', None) == 'max_tokens':
+                logger.warning("응답이 최대 토큰 수(%d)에서 잘렸습니다", max_tokens or self.config.MAX_TOKENS)
             
-            # 형식 정리
-            comment = self._format_comment(comment)
-            print(f"디버깅 - 정리된 주석: {comment[:100]}...")
+            # 0.18.1 버전에서의 응답 처리
+            comment = self._extract_text(response)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Claude API 응답 텍스트: %s...", comment[:100])
             
             return comment
-                
-        except Exception as e:
-            error_msg = str(e)
-            print(f"API 호출 중 오류 발생 (시도 {retry_count + 1}/{self.max_retries}): {error_msg}")
-            
-            if ("overloaded_error" in error_msg or "529" in error_msg) and retry_count < self.max_retries - 1:
-                wait_time = self.retry_delay * (self.retry_multiplier ** retry_count)
-                print(f"서버 과부하로 인해 {wait_time}초 후 재시도합니다...")
-                time.sleep(wait_time)
-                return self._call_claude_api(prompt, retry_count + 1)
+        
+        return None
+    
+    def _get_retry_wait(self, error: anthropic.APIError, attempt: int) -> float:
+        """재시도 대기 시간 계산 - Retry-After 헤더 우선, 없으면 지수 백오프 + 지터"""
+        wait_time = self.retry_delay * (self.retry_multiplier ** attempt)
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after:
+            try:
+                wait_time = float(retry_after)
+            except ValueError:
+                pass
+        return wait_time + random.uniform(0, 1)
+    
+    def _extract_text(self, response) -> str:
+        """다양한 응답 형식에서 텍스트 추출"""
+        comment = ""
+        if hasattr(response, 'content'):
+            if isinstance(response.content, list):
+                # ContentBlock 리스트인 경우
+                for block in response.content:
+                    if hasattr(block, 'text'):
+                        comment += block.text
+                    elif hasattr(block, 'content'):
+                        comment += str(block.content)
+                    else:
+                        comment += str(block)
+            elif hasattr(response.content, 'text'):
+                # 단일 ContentBlock인 경우
+                comment = response.content.text
             else:
-                return None
+                # 문자열인 경우
+                comment = str(response.content)
+        else:
+            # response 자체가 텍스트인 경우
+            comment = str(response)
+        return comment
     
     def _format_comment(self, comment: str) -> str:
         """주석 형식 정리"""
@@ -149,84 +544,51 @@ class CommentGenerator:
         # 마크다운 코드 블록 제거
         comment = comment.replace('```java', '').replace('```', '').strip()
         
-        # JavaDoc 형식 확인 및 수정
-        if not comment.startswith('/**'):
-            comment = '/**\n * ' + comment
-        if not comment.endswith('*/'):
-            comment = comment.rstrip() + '\n */'
-            
-        # 각 줄 형식 정리
-        lines = comment.split('\n')
-        formatted_lines = []
-        
-        for i, line in enumerate(lines):
-            if i == 0:  # 첫 줄 /**
-                formatted_lines.append('/**')
-            elif i == len(lines) - 1:  # 마지막 줄 */
-                formatted_lines.append(' */')
-            else:
-                # 중간 줄들은 ' * '로 시작해야 함
-                content = line.strip()
-                if content.startswith('*'):
-                    content = content[1:].strip()
-                
-                if content == '':
-                    formatted_lines.append(' *')
-                else:
-                    formatted_lines.append(' * ' + content)
-        
-        return '\n'.join(formatted_lines)
-
-    def _generate_class_comment(self, element: JavaElement, context: Union[str, List[str]]) -> str:
-        """클래스 주석 생성"""
-        context_lines = self._prepare_context(context)
+        # 여닫는 기호를 떼어낸 뒤 본문 각 줄을 ' * ' 형식으로 한 번에 정리
+        body = _JAVADOC_FENCE_RE.sub('', comment).strip()
+        body = _COMMENT_LINE_RE.sub(
+            lambda m: ' * ' + m.group(1) if m.group(1) else ' *',
+            body
+        )
+        return '/**\n' + body + '\n */'
+
+    def _element_request(self, element: JavaElement,
+                         window: Callable[[int, int], str]) -> Optional[Tuple[str, str, Optional[int]]]:
+        """요소 하나에 대한 개별 요청 (system, prompt, max_tokens) 반환"""
+        if element.type in ['class', 'interface', 'enum']:
+            return STATIC_CLASS_INSTRUCTIONS, self._class_prompt(element, window), None
+        elif element.type == 'method':
+            return STATIC_METHOD_INSTRUCTIONS, self._method_prompt(element, window), None
+        elif element.type == 'field':
+            return STATIC_FIELD_INSTRUCTIONS, self._field_prompt(element, window), FIELD_MAX_TOKENS
+        return None
+
+    def _class_prompt(self, element: JavaElement, window: Callable[[int, int], str]) -> str:
+        """클래스 주석 요청 프롬프트"""
         class_line = element.line_number - 1
         
         # 클래스 주변 코드
-        start_line = max(0, class_line - 10)
-        end_line = min(len(context_lines), class_line + 20)
-        surrounding_context = '\n'.join(context_lines[start_line:end_line])
+        surrounding_context = window(class_line - 10, class_line + 20)
         
-        prompt = f"""다음 Java 클래스에 대한 JavaDoc 주석을 생성해주세요.
-
-클래스 코드:
-{surrounding_context}
-
-요구사항:
-1. 클래스의 주요 목적과 책임을 첫 줄에 명확하게 설명
-2. 두 번째 줄부터 핵심 기능과 사용 목적을 설명
-3. 필요한 경우에만 @throws 태그 포함
-4. 설명과 태그 사이에 빈 줄 추가
-5. 각 줄은 ' * '로 시작
-6. 한국어로 작성
-7. JavaDoc 표준 형식 준수
-
-예시:
-/**
- * 클래스의 주요 목적을 한 줄로 설명합니다.
- * 클래스의 핵심 기능과 사용 목적을 설명합니다.
- * 
- * @throws ExceptionType 예외 발생 조건 (필요한 경우만)
- */
-
-주석만 반환해주세요."""
+        return f"""클래스 코드:
+{surrounding_context}"""
 
-        comment = self._call_claude_api(prompt)
+    async def _generate_class_comment(self, element: JavaElement,
+                                      window: Callable[[int, int], str]) -> Optional[str]:
+        """클래스 주석 생성 (API 호출에 실패하면 None)"""
+        comment = await self._call_claude_api(STATIC_CLASS_INSTRUCTIONS, self._class_prompt(element, window))
         
         if comment is None:
-            return f"/**\n * {element.name} 클래스\n */"
+            return None
             
-        return comment
+        return self._format_comment(comment)
 
-    def _generate_method_comment(self, element: JavaElement, context: Union[str, List[str]]) -> str:
-        """메소드 주석 생성"""
-        context_lines = self._prepare_context(context)
+    def _method_prompt(self, element: JavaElement, window: Callable[[int, int], str]) -> str:
+        """메소드 주석 요청 프롬프트"""
         method_line = element.line_number - 1
         
         # 메소드 주변 코드
-        start_line = max(0, method_line - 5)
-        end_line = min(len(context_lines), method_line + 15)
-        method_context = '\n'.join(context_lines[start_line:end_line])
+        method_context = window(method_line - 5, method_line + 15)
         
         # 메소드 시그니처 분석
         method_info = self._extract_method_signature(element.content)
@@ -238,108 +600,57 @@ class CommentGenerator:
             for param in method_info['parameters']:
                 param_info += f"- {param['name']} ({param['type']})\n"
         
-        prompt = f"""다음 Java 메소드에 대한 완전한 JavaDoc 주석을 생성해주세요.
-
-메소드 코드:
+        return f"""메소드 코드:
 {method_context}
 
 메소드 정보:
 - 메소드명: {element.name}
 - 반환타입: {method_info.get('return_type', 'void')}
 {param_info}
-- 예외: {', '.join(method_info.get('exceptions', []))}
-
-요구사항:
-1. 메소드의 핵심 목적을 첫 줄에 명확하고 간결하게 설명
-2. 두 번째 줄부터 구체적인 동작 방식과 제약사항 설명
-3. 모든 파라미터에 대해 @param 태그로 상세 설명
-4. 반환값이 있으면 @return 태그로 상세 설명
-5. 발생 가능한 예외는 @throws 태그로 구체적인 발생 조건 설명
-6. 설명과 태그 사이에 빈 줄 추가
-7. 각 줄은 ' * '로 시작
-8. 한국어로 작성
-9. JavaDoc 표준 형식 준수
+- 예외: {', '.join(method_info.get('exceptions', []))}"""
 
-예시:
-/**
- * 메소드의 핵심 기능을 한 줄로 설명합니다.
- * 구체적인 동작 방식과 처리 과정을 설명합니다.
- * 
- * @param paramName 파라미터에 대한 상세한 설명
- * @return 반환값에 대한 상세한 설명
- * @throws ExceptionType 예외 발생 조건
- */
-
-주석만 반환해주세요."""
-
-        comment = self._call_claude_api(prompt)
+    async def _generate_method_comment(self, element: JavaElement,
+                                       window: Callable[[int, int], str]) -> Optional[str]:
+        """메소드 주석 생성 (API 호출에 실패하면 None)"""
+        comment = await self._call_claude_api(STATIC_METHOD_INSTRUCTIONS, self._method_prompt(element, window))
         
         if comment is None:
-            return f"/**\n * {element.name} 메소드\n */"
+            return None
             
-        return comment
+        return self._format_comment(comment)
 
-    def _generate_field_comment(self, element: JavaElement, context: Union[str, List[str]]) -> str:
-        """필드 주석 생성"""
-        context_lines = self._prepare_context(context)
+    def _field_prompt(self, element: JavaElement, window: Callable[[int, int], str]) -> str:
+        """필드 주석 요청 프롬프트"""
         field_line = element.line_number - 1
         
         # 필드 선언과 주변 컨텍스트
-        start_line = max(0, field_line - 5)
-        end_line = min(len(context_lines), field_line + 5)
-        surrounding_context = '\n'.join(context_lines[start_line:end_line])
+        surrounding_context = window(field_line - 5, field_line + 5)
         
-        prompt = f"""다음 Java 필드에 대한 간단한 주석을 생성해주세요.
+        return f"""필드 코드:
+{surrounding_context}"""
 
-필드 코드:
-{surrounding_context}
-
-요구사항:
-1. 한 줄 주석(//) 형식
-2. 필드의 구체적인 용도와 의미 설명
-3. 한국어로 작성
-4. 필드명만 반복하는 설명 금지
-
-예시:
-// 사용자 인증 상태를 저장하는 플래그
-
-주석만 반환해주세요."""
-
-        try:
-            # 필드는 간단한 주석이므로 직접 API 호출
-            response = self.client.messages.create(
-                model=self.config.MODEL,
-                max_tokens=200,  # 필드는 짧게
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            )
-            
-            # 응답 처리
-            comment = ""
-            if hasattr(response, 'content'):
-                if isinstance(response.content, list):
-                    for block in response.content:
-                        if hasattr(block, 'text'):
-                            comment += block.text
-                        else:
-                            comment += str(block)
-                else:
-                    comment = str(response.content)
-            
-            # // 형식으로 정리
-            comment = comment.strip().replace('```', '')
-            if not comment.startswith('//'):
-                comment = '// ' + comment
-            
-            return comment
-            
-        except Exception as e:
-            print(f"필드 주석 생성 중 오류 발생: {e}")
-            return f"// {element.name} 필드"
+    async def _generate_field_comment(self, element: JavaElement,
+                                      window: Callable[[int, int], str]) -> Optional[str]:
+        """필드 주석 생성 (API 호출에 실패하면 None)"""
+        comment = await self._call_claude_api(
+            STATIC_FIELD_INSTRUCTIONS,
+            self._field_prompt(element, window),
+            max_tokens=FIELD_MAX_TOKENS
+        )
+        
+        if comment is None:
+            return None
+        
+        return self._format_field_comment(comment)
+    
+    def _format_field_comment(self, comment: str) -> str:
+        """필드 주석을 한 줄 // 형식으로 정리 (여러 줄이나 JavaDoc 형식 응답은 한 줄로 합침)"""
+        comment = comment.replace('```java', '').replace('```', '')
+        body = _JAVADOC_FENCE_RE.sub('', comment.strip())
+        # 각 줄의 //, * 기호를 떼어내고 내용만 이어 붙임
+        text = ' '.join(filter(None, (line.strip().lstrip('/*').strip() for line in body.splitlines())))
+        
+        return '// ' + text
 
     def _extract_field_info(self, field_content: str) -> Dict[str, Any]:
         """필드 선언에서 정보 추출"""
@@ -351,21 +662,21 @@ class CommentGenerator:
             'is_final': False
         }
         
+        # 초기값 앞의 선언부만 한 번 토큰화 (초기값 문자열 속 단어는 제외)
+        tokens = set(_WORD_RE.findall(field_content.split('=', 1)[0]))
+        
         # 접근 제한자
-        if 'public' in field_content:
-            info['access_modifier'] = 'public'
-        elif 'private' in field_content:
-            info['access_modifier'] = 'private'
-        elif 'protected' in field_content:
-            info['access_modifier'] = 'protected'
+        info['access_modifier'] = next(
+            (m for m in ('public', 'private', 'protected') if m in tokens),
+            'default'
+        )
         
         # static, final 확인
-        info['is_static'] = 'static' in field_content
-        info['is_final'] = 'final' in field_content
+        info['is_static'] = 'static' in tokens
+        info['is_final'] = 'final' in tokens
         
         # 타입과 초기값 추출
-        pattern = re.compile(r'(\w+(?:<[^>]*>)?(?:\[\])?)\s+\w+(?:\s*=\s*([^;]+))?;')
-        match = pattern.search(field_content)
+        match = _FIELD_DECL_RE.search(field_content)
         if match:
             info['type'] = match.group(1)
             if match.group(2):
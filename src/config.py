@@ -1,19 +1,42 @@
 import os
 
+# Config.BACKUP_DIR가 지정되지 않았을 때 사용할 백업 디렉토리 이름
+DEFAULT_BACKUP_DIR = 'backup_before_comments'
+
 class Config:
     def __init__(self):
         # API 설정
         self.ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
         self.MODEL = "claude-3-5-sonnet-20241022"  # Claude 모델 버전
         self.MAX_TOKENS = 4096  # 최대 토큰 수
+        self.MAX_CONCURRENCY = 5  # 동시에 보낼 수 있는 최대 API 요청 수
+        self.REQUESTS_PER_SECOND = 50 / 60  # 초당 최대 API 요청 수 (분당 50회)
+        self.REQUEST_BURST = 5  # 한 번에 몰아서 보낼 수 있는 최대 요청 수
+        
+        # HTTP 연결 설정
+        self.HTTP_MAX_CONNECTIONS = 32  # 연결 풀의 최대 연결 수
+        self.HTTP_MAX_KEEPALIVE_CONNECTIONS = 16  # 재사용을 위해 유지할 최대 연결 수
+        self.REQUEST_TIMEOUT = 120.0  # 요청 타임아웃 (초)
+        self.CONNECT_TIMEOUT = 10.0  # 연결 타임아웃 (초)
+
+        # 디버그 모드 (상세 진행 로그 출력)
+        self.DEBUG = False
 
         # 프로젝트 설정
         self.PROJECT_ROOT = None  # 프로젝트 루트 디렉토리
         self.BACKUP_DIR = None  # 백업 디렉토리
+        self.EXCLUDE_DIRS = [  # 백업에서 제외할 디렉토리
+            'target', 'build', '.git', '.idea', '.vscode',
+            'node_modules', '.gradle', 'bin', 'out'
+        ]
+        self.BACKUP_WORKERS = 8  # 백업 파일 복사에 사용할 스레드 수
         
         # 파일 처리 설정
         self.JAVA_EXTENSIONS = ['.java']  # 처리할 파일 확장자
-        self.IGNORE_PATTERNS = [  # 무시할 디렉토리/파일 패턴
+        self.FILE_WORKERS = 4  # 동시에 처리할 파일 수
+        self.MAX_FILES_IN_FLIGHT = 8  # 처리 대기 큐에 넣어둘 최대 파일 수
+        self.PARSE_WORKERS = os.cpu_count()  # Java 파싱에 사용할 프로세스 수
+        self.IGNORE_PATTERNS = [  # 무시할 디렉토리/파일 패턴 (이 도구의 백업/캐시 디렉토리는 스캐너가 따로 제외)
             'test', 'tests', 'example', 'examples',
             'target', 'build', '.git', '.idea',
             'node_modules', '.gradle', 'bin', 'out'
@@ -21,6 +44,22 @@ class Config:
         
         # 주석 생성 설정
         self.CONTEXT_LINES = 20  # 컨텍스트로 사용할 위아래 라인 수
+        self.BATCH_ELEMENTS_PER_REQUEST = 10  # 요청 하나에 묶어서 보낼 최대 요소 수
+        
+        # Message Batches 설정 (파일이 많으면 요청을 배치 작업 하나로 모아 처리)
+        self.BATCH_THRESHOLD = 50  # 배치 모드를 사용할 최소 파일 수
+        self.BATCH_MAX_REQUESTS = 10000  # 배치 작업 하나에 넣을 최대 요청 수
+        self.BATCH_POLL_INTERVAL = 5.0  # 배치 상태 첫 조회 간격 (초)
+        self.BATCH_POLL_MAX_INTERVAL = 60.0  # 배치 상태 최대 조회 간격 (초)
+        
+        # 응답 캐시 설정
+        self.USE_RESPONSE_CACHE = True  # 동일한 프롬프트에 대한 응답 재사용 여부
+        self.RESPONSE_CACHE_PATH = os.path.join(  # 응답 캐시 파일 경로
+            os.path.expanduser('~'), '.cache', 'java-commentator', 'responses.sqlite3'
+        )
+        self.USE_FILE_CACHE = True  # 내용이 바뀌지 않은 파일의 이전 결과 재사용 여부
+        self.FILE_CACHE_DIR = '.java-commentator-cache'  # 프로젝트 안의 파일 캐시 디렉토리
+        self.USE_SCAN_CACHE = True  # 바뀌지 않은 디렉토리의 파일 목록 재사용 여부
         
         # 주석 스타일 설정
         self.JAVADOC_STYLE = {
@@ -0,0 +1,47 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+class FileCache:
+    """원본 파일 내용의 해시를 키로 주석이 추가된 결과를 저장하는 디스크 캐시
+
+    항목은 <캐시 디렉토리>/<해시 앞 2자리>/<나머지 해시> 파일 하나로 저장된다.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def make_key(content: str, *parts) -> str:
+        """파일 내용과 추가 값(모델, 프롬프트 버전 등)으로 BLAKE2b 캐시 키 생성"""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\0')
+        digest.update(content.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key[2:]
+
+    def get(self, key: str) -> Optional[str]:
+        """캐시된 결과 반환 (없으면 None)"""
+        try:
+            return self._path(key).read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, content: str) -> None:
+        """결과 저장 (임시 파일에 쓴 뒤 교체해 중간 상태가 남지 않도록 함)"""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
@@ -1,12 +1,24 @@
+import asyncio
+import logging
+import multiprocessing
+import os
 import shutil
+import textwrap
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from java_parser import JavaElement, JavaParser
-from comment_generator import CommentGenerator
-from config import Config
+from comment_generator import PROMPT_VERSION, CommentGenerator
+from file_cache import FileCache
+from config import DEFAULT_BACKUP_DIR, Config
 from tqdm import tqdm
 import sys
-import traceback
+
+logger = logging.getLogger(__name__)
+
+def _raise_error(error: OSError) -> None:
+    """os.walk 중 발생한 오류를 그대로 전달 (기본 동작은 조용히 건너뜀)"""
+    raise error
 
 class FileProcessor:
     def __init__(self, config, parser, comment_generator):
@@ -14,89 +26,232 @@ class FileProcessor:
         self.parser = parser
         self.comment_generator = comment_generator
         self.debug_file = sys.stderr
+        # 파싱 전용 프로세스 풀 (process_java_files 실행 중에만 존재)
+        self._parse_pool = None
+        self._file_cache = None
+        # 파일을 덮어쓰기 전에 기다릴 작업 (동시에 진행 중인 백업 등)
+        self.write_gate = None
     
-    def _debug_print(self, message: str):
-        """디버깅 메시지를 stderr로 출력"""
-        print(message, file=self.debug_file, flush=True)
+    @property
+    def file_cache(self) -> Optional[FileCache]:
+        """내용이 바뀌지 않은 파일의 이전 결과를 재사용하기 위한 프로젝트별 캐시
+
+        처리기를 먼저 만들고 나중에 PROJECT_ROOT를 정해도 되도록 처음 사용할 때 생성한다.
+        """
+        if not (self.config.USE_FILE_CACHE and self.config.PROJECT_ROOT):
+            return None
+        cache_dir = Path(self.config.PROJECT_ROOT) / self.config.FILE_CACHE_DIR
+        if self._file_cache is None or self._file_cache.cache_dir != cache_dir:
+            self._file_cache = FileCache(cache_dir)
+        return self._file_cache
+
+    def _debug_print(self, message: str, *args):
+        """디버그 모드일 때만 디버깅 메시지를 stderr로 출력 (args가 있으면 그때 포맷)"""
+        if not self.config.DEBUG:
+            return
+        print(message % args if args else message, file=self.debug_file, flush=True)
+
+    def get_backup_path(self, project_path: Path) -> Path:
+        """프로젝트의 백업 디렉토리 경로"""
+        return project_path / (self.config.BACKUP_DIR or DEFAULT_BACKUP_DIR)
 
     def create_backup(self, project_path: Path) -> Path:
         """프로젝트 백업 생성"""
-        backup_path = project_path / self.config.BACKUP_DIR
+        backup_path = self.get_backup_path(project_path)
         
         if backup_path.exists():
             shutil.rmtree(backup_path)
         
-        # 원본 프로젝트 복사 (제외 디렉토리 제외)
-        shutil.copytree(
-            project_path, 
-            backup_path,
-            ignore=shutil.ignore_patterns(*self.config.EXCLUDE_DIRS)
-        )
+        # 제외 디렉토리와 백업/캐시 디렉토리 자신은 복사하지 않음
+        excluded = set(self.config.EXCLUDE_DIRS) | {backup_path.name, self.config.FILE_CACHE_DIR}
+        
+        # 디렉토리 구조는 먼저 만들고, 파일 복사는 여러 스레드가 나눠서 동시에 수행
+        copies = []
+        for root, dirs, files in os.walk(project_path, onerror=_raise_error):
+            target = os.path.join(backup_path, os.path.relpath(root, project_path))
+            os.makedirs(target, exist_ok=True)
+            # 심볼릭 링크 디렉토리는 따라 들어가지 않고 링크 자체를 복사 목록에 넣음
+            copies.extend(
+                (os.path.join(root, name), os.path.join(target, name))
+                for name in dirs if name not in excluded and os.path.islink(os.path.join(root, name))
+            )
+            dirs[:] = [d for d in dirs if d not in excluded and not os.path.islink(os.path.join(root, d))]
+            copies.extend(
+                (os.path.join(root, name), os.path.join(target, name))
+                for name in files if name not in excluded
+            )
+        
+        with ThreadPoolExecutor(max_workers=self.config.BACKUP_WORKERS) as pool:
+            # 결과를 모두 꺼내서 복사 중 발생한 예외가 그대로 전달되도록 함
+            list(pool.map(lambda paths: self._copy_entry(*paths), copies))
         
         return backup_path
     
-    def process_java_files(self, java_files: List[str]) -> None:
-        """Java 파일 목록을 처리"""
+    def _copy_entry(self, source: str, target: str) -> None:
+        """파일 하나를 백업 위치로 복사 (심볼릭 링크는 같은 대상을 가리키는 링크로 다시 만듦)"""
+        if os.path.islink(source):
+            os.symlink(os.readlink(source), target)
+        else:
+            shutil.copy2(source, target)
+    
+    async def process_java_files(self, java_files: List[str], dry_run: bool = False,
+                                 on_done: Optional[Callable[[str, bool], None]] = None) -> Tuple[int, int]:
+        """Java 파일 목록을 여러 작업자가 동시에 처리 - (성공 수, 실패 수) 반환
+
+        on_done은 파일 하나의 처리가 끝날 때마다 (파일 경로, 성공 여부)로 호출된다.
+        """
+        queue = asyncio.Queue(maxsize=self.config.MAX_FILES_IN_FLIGHT)
+        # CPU를 쓰는 파싱은 별도 프로세스에서 실행해 이벤트 루프가 API 응답 처리를 계속하도록 함
+        # 백업 스레드가 도는 중에 fork하면 자식 프로세스가 멈출 수 있으므로 spawn으로 작업 프로세스 생성
+        with ProcessPoolExecutor(max_workers=self.config.PARSE_WORKERS,
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            self._parse_pool = pool
+            try:
+                workers = [
+                    asyncio.create_task(self._worker(queue, dry_run, on_done))
+                    for _ in range(self.config.FILE_WORKERS)
+                ]
+                
+                for file_path in java_files:
+                    await queue.put(file_path)
+                # 작업자마다 종료 신호 전달
+                for _ in workers:
+                    await queue.put(None)
+                
+                counts = await asyncio.gather(*workers)
+            finally:
+                self._parse_pool = None
+        
+        return sum(ok for ok, _ in counts), sum(failed for _, failed in counts)
+
+    async def prefetch_comments(self, java_files: List[str],
+                                on_progress: Optional[Callable[[Dict[str, int]], None]] = None) -> None:
+        """모든 파일의 주석 요청을 Message Batches 작업으로 미리 처리"""
+        requests = []
         for file_path in java_files:
             try:
-                self._debug_print(f"\n디버깅 - 파일 처리 시작: {file_path}")
-                self.process_java_file(file_path)
+                content = Path(file_path).read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError) as e:
+                # 읽을 수 없는 파일은 본 처리 단계에서 오류로 보고됨
+                self._debug_print("디버깅 - 배치 준비 중 파일 건너뜀 (%s): %s", file_path, e)
+                continue
+            if self._cached_output(content) is not None:
+                continue
+            elements = self.parser.parse(content)
+            requests.extend(self.comment_generator.plan_requests(elements, content.splitlines(keepends=True)))
+        
+        self._debug_print("디버깅 - 배치 요청 %d개 준비 완료", len(requests))
+        await self.comment_generator.prefetch(requests, on_progress)
+
+    async def _worker(self, queue: asyncio.Queue, dry_run: bool,
+                      on_done: Optional[Callable[[str, bool], None]]) -> Tuple[int, int]:
+        """큐에서 파일을 하나씩 꺼내 처리하는 작업자 - (성공 수, 실패 수) 반환"""
+        success_count = 0
+        error_count = 0
+        while True:
+            file_path = await queue.get()
+            if file_path is None:
+                return success_count, error_count
+            try:
+                self._debug_print("\n디버깅 - 파일 처리 시작: %s", file_path)
+                await self.process_java_file(file_path, dry_run=dry_run)
+                success = True
+                success_count += 1
             except Exception as e:
-                self._debug_print(f"파일 처리 중 오류 발생 ({file_path}): {e}")
-                self._debug_print(f"디버깅 - 상세 오류:\n{traceback.format_exc()}")
-
-    def process_java_file(self, file_path: str) -> None:
-        """단일 Java 파일 처리"""
-        try:
-            # 파일 읽기
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self._debug_print(f"디버깅 - 파일 읽기 완료: {type(content)}")
-
-            # 파일 내용을 라인 단위로 분리
-            content_lines = content.splitlines()
-            self._debug_print(f"디버깅 - _get_lines 호출: content 타입 = {type(content)}")
-            self._debug_print("디버깅 - content가 문자열임")
-            self._debug_print(f"디버깅 - 라인 리스트 변환 완료: {type(content_lines)}")
+                # 상세 트레이스백은 디버그 모드일 때만 로깅 핸들러가 포맷
+                logger.error("파일 처리 중 오류 발생 (%s): %s", file_path, e, exc_info=self.config.DEBUG)
+                success = False
+                error_count += 1
+            if on_done is not None:
+                on_done(file_path, success)
+
+    async def process_java_file(self, file_path: str, dry_run: bool = False) -> None:
+        """단일 Java 파일 처리 (dry_run이면 주석만 생성하고 파일은 수정하지 않음)"""
+        # 파일 읽기
+        content = Path(file_path).read_text(encoding='utf-8')
+
+        # 이전 실행과 내용이 같으면 API 호출 없이 저장된 결과 사용
+        cached = self._cached_output(content)
+        if cached is not None:
+            self._debug_print("디버깅 - 파일 캐시 사용: %s", file_path)
+            if cached != content and not dry_run:
+                await self._write_file(file_path, cached)
+            return
+
+        # 파일 내용을 라인 단위로 분리 (줄바꿈 문자를 유지해 저장 시 다시 join하지 않음)
+        content_lines = content.splitlines(keepends=True)
+        
+        # Java 요소 파싱
+        elements = await self._parse(content)
+        self._debug_print("디버깅 - Java 요소 파싱 완료: %d 개 요소 발견\n", len(elements))
+
+        # 요소들을 묶어서 요청 단위로 주석 생성
+        comments = await self.comment_generator.generate_comments(elements, content_lines)
+        
+        # 기본 주석을 대신 넣으면 다음 실행에서 주석이 있는 요소로 보고 건너뛰므로 파일을 수정하지 않고 실패 처리
+        failed = [element.name for element, comment in zip(elements, comments) if comment is None]
+        if failed:
+            raise RuntimeError(f"주석 생성 API 호출 실패: {', '.join(failed)}")
+
+        # 요소별 주석을 모아 두었다가 한 번에 삽입
+        insertions = []
+        for element, comment in zip(elements, comments):
+            self._debug_print("디버깅 - 주석 삽입 준비: %s %s", element.type, element.name)
             
-            # Java 요소 파싱
-            elements = self.parser.parse(content)
-            self._debug_print(f"디버깅 - Java 요소 파싱 완료: {len(elements)} 개 요소 발견\n")
+            # 주석 들여쓰기 적용
+            position = element.line_number - 1
+            indent = self._get_indent(content_lines[position])
+            insertions.append((position, self._indent_comment(comment, ' ' * indent) + '\n'))
+        
+        modified = ''.join(self._insert_comments(content_lines, insertions))
+        self._debug_print("디버깅 - 주석 삽입 완료\n")
 
-            # 각 요소에 대해 주석 생성 및 삽입
-            modified_lines = content_lines.copy()
-            for element in elements:
-                self._debug_print(f"\n디버깅 - 요소 처리 시작: {element.type} {element.name}")
-                self._debug_print(f"디버깅 - 주석 생성 시작: content_lines 타입 = {type(content_lines)}\n")
-                
-                # 주석 생성
-                comment = self.comment_generator.generate_comment(element, content_lines)
-                
-                # 주석 들여쓰기 적용
-                indent = self._get_indent(modified_lines[element.line_number - 1])
-                indented_comment = self._indent_comment(comment, ' ' * indent)
-                
-                # 주석 삽입
-                modified_lines = self._insert_comment(modified_lines, element.line_number - 1, indented_comment)
-                self._debug_print("디버깅 - 주석 삽입 완료\n")
-
-            # 수정된 내용을 파일에 저장
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(modified_lines))
-
-        except Exception as e:
-            self._debug_print(f"파일 처리 중 오류 발생 ({file_path}): {e}")
-            self._debug_print(f"디버깅 - 상세 오류:\n{traceback.format_exc()}")
-            raise
+        if dry_run:
+            return
+
+        # 결과를 원본 내용과 결과 내용 양쪽 키로 저장 (주석을 단 파일을 다시 처리할 때도 바로 건너뜀)
+        self._store_output(content, modified)
+
+        # 수정된 내용을 파일에 저장
+        await self._write_file(file_path, modified)
+    
+    def _file_cache_key(self, content: str) -> str:
+        return FileCache.make_key(content, self.config.MODEL, PROMPT_VERSION)
+    
+    def _cached_output(self, content: str) -> Optional[str]:
+        """파일 캐시에 저장된 처리 결과 반환 (캐시를 쓰지 않거나 없으면 None)"""
+        if self.file_cache is None:
+            return None
+        return self.file_cache.get(self._file_cache_key(content))
+    
+    def _store_output(self, content: str, modified: str) -> None:
+        """처리 결과를 파일 캐시에 저장"""
+        if self.file_cache is None:
+            return
+        self.file_cache.set(self._file_cache_key(content), modified)
+        if modified != content:
+            self.file_cache.set(self._file_cache_key(modified), modified)
     
+    async def _write_file(self, file_path: str, content: str) -> None:
+        """수정된 내용을 파일에 저장 (write_gate가 있으면 끝날 때까지 기다린 뒤 저장)"""
+        if self.write_gate is not None:
+            await self.write_gate
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    
+    async def _parse(self, content: str) -> List[JavaElement]:
+        """프로세스 풀이 있으면 풀에서, 없으면 현재 스레드에서 파싱"""
+        if self._parse_pool is None:
+            return self.parser.parse(content)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._parse_pool, self.parser.parse, content)
+
     def _get_indent(self, line: str) -> int:
         """라인의 들여쓰기 공백 수를 반환"""
         return len(line) - len(line.lstrip())
 
     def _indent_comment(self, comment: Union[str, List[str]], indent: str) -> str:
         """주석에 들여쓰기 적용"""
-        self._debug_print(f"디버깅 - _indent_comment 호출: comment 타입 = {type(comment)}")
-        
         # 리스트인 경우 문자열로 변환
         if isinstance(comment, list):
             self._debug_print("디버깅 - comment가 리스트임, 문자열로 변환")
@@ -104,16 +259,19 @@ class FileProcessor:
         
         # 문자열이 아닌 경우 빈 문자열 반환
         if not isinstance(comment, str):
-            self._debug_print(f"디버깅 - comment가 예상치 못한 타입임: {type(comment)}")
+            self._debug_print("디버깅 - comment가 예상치 못한 타입임: %s", type(comment))
             return ""
         
-        # 들여쓰기 적용
-        lines = comment.splitlines()
-        indented_lines = [indent + line if line.strip() else line for line in lines]
-        return '\n'.join(indented_lines)
-
-    def _insert_comment(self, lines: List[str], position: int, comment: str) -> List[str]:
-        """주석을 지정된 위치에 삽입"""
-        result = lines.copy()
-        result.insert(position, comment)
+        # 빈 줄을 제외한 각 줄에 들여쓰기 적용
+        return textwrap.indent(comment.rstrip('\n'), indent, predicate=str.strip)
+
+    def _insert_comments(self, lines: List[str], insertions: List[Tuple[int, str]]) -> List[str]:
+        """(위치, 주석) 목록의 주석들을 한 번의 순회로 삽입"""
+        result = []
+        previous = 0
+        for position, comment in sorted(insertions, key=lambda insertion: insertion[0]):
+            result.extend(lines[previous:position])
+            result.append(comment)
+            previous = position
+        result.extend(lines[previous:])
         return result
\ No newline at end of file
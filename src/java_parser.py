@@ -13,107 +13,245 @@ class JavaElement:
     existing_comment: Optional[str] = None  # 기존 주석 (있는 경우)
     method_info: Optional[dict] = None  # 메소드 상세 정보 (있는 경우)
 
-class JavaParser:
-    def __init__(self):
-        # 주석 패턴
-        self.comment_pattern = re.compile(
-            r'/\*\*\s*(.*?)\s*\*/',
-            re.MULTILINE | re.DOTALL
-        )
+# 스캐너가 멈춰서 처리해야 하는 토큰 (주석, 문자열/문자 리터럴, 괄호, 대입, 문장/블록 경계)
+_TOKEN_RE = re.compile(r'//|/\*|"""|["\'(){};=]')
+_TEXT_BLOCK_RE = re.compile(r'"""(?:[^\\]|\\.)*?"""', re.DOTALL)
+_STRING_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"?')
+_CHAR_RE = re.compile(r"'(?:[^'\\\n]|\\.)*'?")
+
+# 선언부(헤더) 판별용 조각 - 스캐너가 잘라낸 짧은 헤더 문자열에만 적용
+_GENERIC = r'<(?:[^<>]|<(?:[^<>]|<[^<>]*>)*>)*>'
+_ANNOTATIONS = r'(?:@(?!interface\b)[\w.]+(?:\s*\((?:[^()]|\([^()]*\))*\))?\s*)*'
+_TYPE = r'[\w.$]+(?:\s*' + _GENERIC + r')?(?:\s*\[\s*\])*'
+# 괄호 안의 내용 (애노테이션 인자처럼 두 단계까지 중첩된 괄호 포함)
+_PARENS_BODY = r'(?:[^()]|\((?:[^()]|\([^()]*\))*\))*'
+
+# 클래스/인터페이스/열거형 선언
+_TYPE_DECL_RE = re.compile(
+    _ANNOTATIONS +
+    r'(?:(?:public|protected|private|static|final|abstract|sealed|non-sealed|strictfp)\s+)*'
+    r'(?P<kind>class|interface|enum|record|@interface)\s+(?P<name>\w+)'
+)
+
+# 메소드/생성자 선언 (본문 '{' 직전까지)
+_METHOD_DECL_RE = re.compile(
+    _ANNOTATIONS +
+    r'(?:(?:public|protected|private|static|final|abstract|synchronized|native|default|strictfp)\s+)*'
+    r'(?:' + _GENERIC + r'\s*)?'
+    r'(?:(?P<return_type>' + _TYPE + r')\s+)?'
+    r'(?P<name>\w+)\s*\((?P<params>' + _PARENS_BODY + r')\)'
+    r'(?:\s*throws\s+(?P<throws>[\w.$\s,]+?))?\s*'
+)
+
+# 필드 선언 (';' 직전까지)
+_FIELD_DECL_RE = re.compile(
+    _ANNOTATIONS +
+    r'(?:(?:public|protected|private|static|final|transient|volatile)\s+)*'
+    r'(?P<type>' + _TYPE + r')\s+(?P<name>\w+)\s*(?:\[\s*\]\s*)*(?:=|$)'
+)
+
+# 메소드 파라미터 하나 (제네릭 안의 ','와 가변 인자 '...'를 포함한 타입, 이름)
+_PARAM_RE = re.compile(
+    r'\s*(?:final\s+)?' + _ANNOTATIONS + r'(?:final\s+)?'
+    r'(?P<type>' + _TYPE + r'(?:\s*\.\.\.\s*|\s+))(?P<name>\w+)(?:\s*\[\s*\])*\s*(?:,|$)'
+)
+
+# 선언 키워드 -> JavaElement.type
+_TYPE_KINDS = {
+    'class': 'class',
+    'record': 'class',
+    'interface': 'interface',
+    '@interface': 'interface',
+    'enum': 'enum'
+}
+
+# 메소드 이름으로 잘못 인식될 수 있는 키워드
+_NON_METHOD_NAMES = {'if', 'for', 'while', 'switch', 'catch', 'synchronized', 'return', 'new', 'throw'}
+
+def split_parameters(params_str: str) -> List[Dict[str, str]]:
+    """파라미터 목록 문자열을 [{'type': ..., 'name': ...}] 형태로 분리"""
+    return [
+        {'type': match.group('type').strip(), 'name': match.group('name')}
+        for match in _PARAM_RE.finditer(params_str)
+    ]
+
+class _JavaScanner:
+    """Java 소스를 한 번만 훑으면서 클래스, 메소드, 필드 선언을 찾는 스캐너
+
+    중괄호 블록 종류를 스택으로 관리하므로 메소드 본문 안의 코드는 선언으로 취급하지 않는다.
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        self.events = []  # (종류, 매치 객체, 선언부 문자열, 라인 번호)
+        self.scopes = []  # 'type', 'enum', 'method', 'block', 'init'
+        self.paren_depth = 0
+        self.line_number = 1
+        self.line_pos = 0
+        self._reset_header(0)
+
+    def _reset_header(self, pos: int) -> None:
+        """다음 선언부 수집 시작"""
+        self.segments = []  # 주석을 뺀 선언부 코드 조각
+        self.segment_start = pos
+        self.header_start = None  # 선언부 첫 글자의 위치
+        self.documented = False  # 선언 앞에 JavaDoc 주석이 있는지
+        self.line_commented = False  # 선언 앞에 한 줄 주석이 있는지
+        self.assigned = False  # 괄호 밖에 '='가 나왔는지 (필드 초기화 식)
+
+    def _add_segment(self, end: int) -> None:
+        """segment_start부터 end까지의 코드를 선언부에 추가"""
+        segment = self.content[self.segment_start:end]
+        if self.header_start is None:
+            stripped = segment.lstrip()
+            if stripped:
+                self.header_start = end - len(stripped)
+        self.segments.append(segment)
+
+    def _line_of(self, offset: int) -> int:
+        """오프셋의 라인 번호 (오프셋이 증가하는 순서로만 호출되므로 증분 계산)"""
+        self.line_number += self.content.count('\n', self.line_pos, offset)
+        self.line_pos = offset
+        return self.line_number
+
+    def _emit(self, kind: str, match, header: str) -> None:
+        if not self.documented:
+            self.events.append((kind, match, header, self._line_of(self.header_start)))
+
+    def scan(self) -> list:
+        content = self.content
+        length = len(content)
+        pos = 0
         
-        # 클래스 패턴
-        self.class_pattern = re.compile(
-            r'(?P<comment>/\*\*.*?\*/\s*)?'  # JavaDoc 주석 (옵션)
-            r'(?P<annotations>(?:@\w+(?:\([^)]*\))?\s*)*)'  # 어노테이션들
-            r'(?P<modifiers>(?:public|private|protected|static|final|abstract)\s+)*'  # 제어자들
-            r'class\s+'  # class 키워드
-            r'(?P<name>\w+)'  # 클래스 이름
-            r'(?:\s+extends\s+\w+(?:\s*\.\s*\w+)*)?'  # 상속 (옵션)
-            r'(?:\s+implements\s+(?:\w+(?:\s*\.\s*\w+)*(?:\s*,\s*\w+(?:\s*\.\s*\w+)*)*))?\s*'  # 인터페이스 구현 (옵션)
-            r'{',  # 클래스 본문 시작
-            re.MULTILINE | re.DOTALL
-        )
+        while True:
+            match = _TOKEN_RE.search(content, pos)
+            if not match:
+                break
+            token = match.group()
+            start = match.start()
+            pos = start + 1
+            
+            if token == '//':
+                # 한 줄 주석: 선언부에서 제외하고, 줄 맨 앞에 있으면 주석이 달린 선언으로 기록
+                self._add_segment(start)
+                line_start = content.rfind('\n', 0, start) + 1
+                if self.header_start is None and not content[line_start:start].strip():
+                    self.line_commented = True
+                end = content.find('\n', start)
+                pos = self.segment_start = length if end == -1 else end
+            elif token == '/*':
+                # 블록 주석: /** ... */ 는 JavaDoc으로 기록
+                self._add_segment(start)
+                end = content.find('*/', start + 2)
+                pos = self.segment_start = length if end == -1 else end + 2
+                if content.startswith('/**', start) and pos - start > 4:
+                    self.documented = True
+            elif token in ('"""', '"', "'"):
+                # 문자열/문자 리터럴은 건너뛰되 선언부에는 그대로 포함
+                pattern = _TEXT_BLOCK_RE if token == '"""' else _STRING_RE if token == '"' else _CHAR_RE
+                literal = pattern.match(content, start)
+                pos = literal.end() if literal else length
+            elif token == '(':
+                self.paren_depth += 1
+            elif token == ')':
+                self.paren_depth = max(0, self.paren_depth - 1)
+            elif self.paren_depth > 0:
+                # 괄호 안의 '=', '{', '}', ';' (어노테이션 값, for 문, 람다 인자 등)는 경계가 아님
+                continue
+            elif token == '=':
+                self.assigned = True
+            elif token == '{':
+                self._open_block(start)
+            elif token == '}':
+                scope = self.scopes.pop() if self.scopes else None
+                if scope != 'init':
+                    self._reset_header(pos)
+            elif token == ';':
+                self._end_statement(start)
         
-        # 메소드 패턴
-        self.method_pattern = re.compile(
-            r'(?P<comment>/\*\*.*?\*/\s*)?'  # JavaDoc 주석 (옵션)
-            r'(?P<annotations>(?:@\w+(?:\([^)]*\))?\s*)*)'  # 어노테이션들
-            r'(?P<modifiers>(?:public|private|protected|static|final|synchronized|abstract)\s+)*'  # 제어자들
-            r'(?P<return_type>(?:(?:[\w.]+)(?:<[^>]+>)?(?:\[\])*)\s+)?'  # 반환 타입 (생성자는 없음)
-            r'(?P<name>\w+)\s*'  # 메소드 이름
-            r'\((?P<params>[^)]*)\)'  # 파라미터
-            r'(?:\s+throws\s+(?P<throws>[\w\s,]+))?\s*'  # 예외 선언 (옵션)
-            r'{',  # 메소드 본문 시작
-            re.MULTILINE | re.DOTALL
-        )
+        return self.events
 
-    def _extract_comment(self, comment: Optional[str]) -> Optional[str]:
-        """주석에서 JavaDoc 내용만 추출"""
-        if not comment:
-            return None
+    def _open_block(self, start: int) -> None:
+        """'{' 처리 - 선언부를 보고 블록 종류를 결정"""
+        scope = self.scopes[-1] if self.scopes else None
+        if scope == 'init' or (self.assigned and scope == 'type'):
+            # 필드 초기화 식 안의 중괄호 (배열 초기화, 익명 클래스, 람다 본문)
+            self.scopes.append('init')
+            return
+        
+        self._add_segment(start)
+        header = ''.join(self.segments).strip()
+        block = 'block'
         
-        # 주석 기호와 불필요한 공백 제거
-        lines = comment.split('\n')
-        cleaned_lines = []
-        for line in lines:
-            # 주석 시작과 끝 제거
-            line = line.replace('/**', '').replace('*/', '').strip()
-            # 줄 시작의 * 제거
-            line = re.sub(r'^\s*\*\s?', '', line)
-            if line:
-                cleaned_lines.append(line)
+        if scope in (None, 'type'):
+            type_match = _TYPE_DECL_RE.match(header)
+            method_match = None if type_match or scope is None else _METHOD_DECL_RE.fullmatch(header)
+            if type_match:
+                self._emit('type', type_match, header + ' {')
+                block = 'enum' if type_match.group('kind') == 'enum' else 'type'
+            elif method_match and method_match.group('name') not in _NON_METHOD_NAMES:
+                self._emit('method', method_match, header + ' {')
+                block = 'method'
         
-        return '\n'.join(cleaned_lines)
+        self.scopes.append(block)
+        self._reset_header(start + 1)
+
+    def _end_statement(self, start: int) -> None:
+        """';' 처리 - 클래스 본문의 필드 선언 확인"""
+        scope = self.scopes[-1] if self.scopes else None
+        if scope == 'init':
+            return
+        
+        if scope == 'type':
+            self._add_segment(start)
+            header = ''.join(self.segments).strip()
+            field_match = _FIELD_DECL_RE.match(header)
+            if field_match and not self.line_commented:
+                self._emit('field', field_match, header + ';')
+        elif scope == 'enum':
+            # 열거형 상수 목록이 끝나면 일반 클래스 본문과 동일
+            self.scopes[-1] = 'type'
+        
+        self._reset_header(start + 1)
+
+class JavaParser:
+    """Java 소스에서 주석을 생성할 요소를 찾는 파서"""
 
     def parse(self, content: str) -> List[JavaElement]:
-        """Java 파일 내용을 파싱하여 클래스와 메소드를 추출"""
+        """Java 파일 내용을 한 번 훑어서 주석이 없는 클래스, 메소드, 필드를 추출"""
         elements = []
         
-        # 클래스 찾기
-        for match in self.class_pattern.finditer(content):
-            class_name = match.group('name')
-            class_comment = self._extract_comment(match.group('comment'))
-            
-            # 이미 주석이 있는 경우 건너뛰기
-            if class_comment:
-                continue
+        for kind, match, header, line_number in _JavaScanner(content).scan():
+            if kind == 'type':
+                elements.append(JavaElement(
+                    type=_TYPE_KINDS[match.group('kind')],
+                    name=match.group('name'),
+                    content=header,
+                    line_number=line_number
+                ))
+            elif kind == 'method':
+                method_info = self._extract_method_info(match)
+                if not method_info:
+                    continue
                 
-            line_number = content[:match.start()].count('\n') + 1
-            
-            elements.append(JavaElement(
-                type='class',
-                name=class_name,
-                content=match.group(0),
-                line_number=line_number,
-                existing_comment=class_comment
-            ))
-        
-        # 메소드 찾기
-        for match in self.method_pattern.finditer(content):
-            method_info = self._extract_method_info(match)
-            if not method_info:
-                continue
-                
-            method_comment = self._extract_comment(match.group('comment'))
-            
-            # 이미 주석이 있는 경우 건너뛰기
-            if method_comment:
-                continue
-            
-            # getter/setter는 처리하지 않음
-            if method_info['name'].startswith(('get', 'set', 'is')):
-                continue
+                # getter/setter는 처리하지 않음
+                if method_info['name'].startswith(('get', 'set', 'is')):
+                    continue
                 
-            line_number = content[:match.start()].count('\n') + 1
-            
-            elements.append(JavaElement(
-                type='method',
-                name=method_info['name'],
-                content=match.group(0),
-                line_number=line_number,
-                existing_comment=method_comment,
-                method_info=method_info  # 메소드 상세 정보 추가
-            ))
+                elements.append(JavaElement(
+                    type='method',
+                    name=method_info['name'],
+                    content=header,
+                    line_number=line_number,
+                    method_info=method_info  # 메소드 상세 정보 추가
+                ))
+            elif kind == 'field':
+                elements.append(JavaElement(
+                    type='field',
+                    name=match.group('name'),
+                    content=header,
+                    line_number=line_number
+                ))
         
         # 라인 번호로 정렬
         elements.sort(key=lambda x: x.line_number)
@@ -123,24 +261,12 @@ class JavaParser:
         """메소드 정보 추출"""
         try:
             name = match.group('name')
-            return_type = match.group('return_type', '').strip() or 'void'
-            params_str = match.group('params', '').strip()
-            throws_str = match.group('throws', '').strip()
+            return_type = (match.group('return_type') or '').strip() or 'void'
+            params_str = (match.group('params') or '').strip()
+            throws_str = (match.group('throws') or '').strip()
             
             # 파라미터 파싱
-            params = []
-            if params_str:
-                for param in params_str.split(','):
-                    param = param.strip()
-                    if param:
-                        parts = param.split()
-                        if len(parts) >= 2:
-                            param_type = ' '.join(parts[:-1])
-                            param_name = parts[-1]
-                            params.append({
-                                'type': param_type.strip(),
-                                'name': param_name.strip()
-                            })
+            params = split_parameters(params_str) if params_str else []
             
             # 예외 파싱
             throws = []
@@ -157,22 +283,6 @@ class JavaParser:
             print(f"메소드 정보 추출 중 오류: {e}")
             return None
 
-    def _extract_full_class_content(self, content: str, start_pos: int) -> str:
-        """클래스의 전체 내용을 추출 (중괄호 매칭)"""
-        brace_count = 0
-        end_pos = start_pos
-        
-        for i in range(start_pos, len(content)):
-            if content[i] == '{':
-                brace_count += 1
-            elif content[i] == '}':
-                brace_count -= 1
-                if brace_count == 0:
-                    end_pos = i + 1
-                    break
-        
-        return content[start_pos:end_pos]
-
     def parse_java_file(self, file_path: Path) -> List[JavaElement]:
         """Java 파일을 파싱하여 클래스, 메소드, 필드 정보 추출"""
         try:
@@ -182,80 +292,4 @@ class JavaParser:
             with open(file_path, 'r', encoding='cp949') as f:
                 content = f.read()
         
-        elements = []
-        
-        # 클래스/인터페이스 찾기
-        for match in self.class_pattern.finditer(content):
-            class_type, class_name = match.groups()
-            line_num = content[:match.start()].count('\n') + 1
-            existing_comment = self._extract_existing_comment(content, match.start())
-            
-            elements.append(JavaElement(
-                name=class_name,
-                element_type=class_type,
-                line_number=line_num,
-                content=match.group(0),
-                existing_comment=existing_comment
-            ))
-        
-        # 메소드 찾기
-        for match in self.method_pattern.finditer(content):
-            indent, method_name = match.groups()
-            line_num = content[:match.start()].count('\n') + 1
-            existing_comment = self._extract_existing_comment(content, match.start())
-            
-            elements.append(JavaElement(
-                name=method_name,
-                element_type='method',
-                line_number=line_num,
-                content=match.group(0),
-                existing_comment=existing_comment
-            ))
-        
-        # 필드 찾기 (생성자와 메소드 내부 제외)
-        for match in self.field_pattern.finditer(content):
-            indent, field_name = match.groups()
-            line_num = content[:match.start()].count('\n') + 1
-            
-            # 메소드 내부의 변수 선언은 제외
-            if self._is_inside_method(content, match.start()):
-                continue
-                
-            existing_comment = self._extract_existing_comment(content, match.start())
-            
-            elements.append(JavaElement(
-                name=field_name,
-                element_type='field',
-                line_number=line_num,
-                content=match.group(0),
-                existing_comment=existing_comment
-            ))
-        
-        return sorted(elements, key=lambda x: x.line_number)
-    
-    def _extract_existing_comment(self, content: str, position: int) -> str:
-        """기존 주석 추출"""
-        lines_before = content[:position].split('\n')
-        
-        comment_lines = []
-        for line in reversed(lines_before):
-            stripped_line = line.strip()
-            if stripped_line.startswith('/**') or stripped_line.startswith('*') or stripped_line.endswith('*/'):
-                comment_lines.insert(0, line)
-            elif stripped_line.startswith('//'):
-                comment_lines.insert(0, line)
-            elif stripped_line == '':
-                continue
-            else:
-                break
-        
-        return '\n'.join(comment_lines) if comment_lines else None
-    
-    def _is_inside_method(self, content: str, position: int) -> bool:
-        """주어진 위치가 메소드 내부인지 확인"""
-        before_content = content[:position]
-        open_braces = before_content.count('{')
-        close_braces = before_content.count('}')
-        
-        # 간단한 휴리스틱: 중괄호 개수로 판단
-        return open_braces > close_braces
\ No newline at end of file
+        return self.parse(content)
\ No newline at end of file
@@ -1,6 +1,8 @@
 import sys
 import os
+import asyncio
 import argparse
+import logging
 from pathlib import Path
 from tqdm import tqdm
 from colorama import init, Fore, Style
@@ -11,14 +13,20 @@ from config import Config
 from java_parser import JavaParser
 from comment_generator import CommentGenerator
 
-init()  # colorama 초기화
+# 터미널에 출력할 때만 colorama를 초기화하고 색상 코드를 한 번만 정해 둠
+# (파이프나 파일로 출력할 때는 색상 코드 없이 출력)
+if sys.stdout.isatty():
+    init()
+    _RED, _GREEN, _YELLOW, _CYAN, _RESET = Fore.RED, Fore.GREEN, Fore.YELLOW, Fore.CYAN, Style.RESET_ALL
+else:
+    _RED = _GREEN = _YELLOW = _CYAN = _RESET = ''
 
 class JavaCodeCommentator:
-    def __init__(self):
-        self.config = Config()
+    def __init__(self, config: Config = None):
+        self.config = config or Config()
         
         if not self.config.ANTHROPIC_API_KEY:
-            print(f"{Fore.RED}❌ ANTHROPIC_API_KEY가 설정되지 않았습니다.{Style.RESET_ALL}")
+            print(f"{_RED}❌ ANTHROPIC_API_KEY가 설정되지 않았습니다.{_RESET}")
             print("1. .env 파일을 생성하고 API 키를 설정하세요.")
             print("2. 또는 환경변수로 ANTHROPIC_API_KEY를 설정하세요.")
             sys.exit(1)
@@ -28,70 +36,133 @@ class JavaCodeCommentator:
         project_path = Path(project_path).resolve()
         
         if not project_path.exists():
-            print(f"{Fore.RED}❌ 프로젝트 경로를 찾을 수 없습니다: {project_path}{Style.RESET_ALL}")
+            print(f"{_RED}❌ 프로젝트 경로를 찾을 수 없습니다: {project_path}{_RESET}")
             return
         
-        print(f"{Fore.CYAN}🔍 프로젝트 스캔 중: {project_path}{Style.RESET_ALL}")
+        print(f"{_CYAN}🔍 프로젝트 스캔 중: {project_path}{_RESET}")
         
         # 프로젝트 스캔
-        scanner = ProjectScanner(project_path)
+        self.config.PROJECT_ROOT = str(project_path)
+        scanner = ProjectScanner(self.config)
         structure = scanner.get_project_structure()
         
         if structure['total_files'] == 0:
-            print(f"{Fore.YELLOW}⚠️  Java 파일을 찾을 수 없습니다.{Style.RESET_ALL}")
+            print(f"{_YELLOW}⚠️  Java 파일을 찾을 수 없습니다.{_RESET}")
             return
         
-        print(f"{Fore.GREEN}✅ {structure['total_files']}개의 Java 파일을 발견했습니다.{Style.RESET_ALL}")
+        print(f"{_GREEN}✅ {structure['total_files']}개의 Java 파일을 발견했습니다.{_RESET}")
         
         # 패키지별 파일 수 출력
         for package, files in structure['files_by_package'].items():
             print(f"   📁 {package}: {len(files)}개 파일")
         
         if dry_run:
-            print(f"{Fore.YELLOW}🔍 Dry-run 모드: 실제 파일 변경 없이 미리보기만 수행합니다.{Style.RESET_ALL}")
+            print(f"{_YELLOW}🔍 Dry-run 모드: 실제 파일 변경 없이 미리보기만 수행합니다.{_RESET}")
         else:
             # 확인 메시지
             response = input(f"\n{structure['total_files']}개 파일에 주석을 추가하시겠습니까? (y/N): ")
             if response.lower() not in ['y', 'yes']:
                 print("작업이 취소되었습니다.")
                 return
+            # 디렉토리 목록 캐시는 실제로 파일을 수정하기로 한 뒤에만 저장
+            scanner.save_scan_cache()
         
-        # 백업 생성
-        if not dry_run and not no_backup:
-            print(f"{Fore.CYAN}💾 백업 생성 중...{Style.RESET_ALL}")
-            processor = FileProcessor()
-            backup_path = processor.create_backup(project_path)
-            print(f"{Fore.GREEN}✅ 백업 완료: {backup_path}{Style.RESET_ALL}")
-        
-        # 파일 처리
-        print(f"{Fore.CYAN}🤖 주석 생성 및 적용 중...{Style.RESET_ALL}")
-        processor = FileProcessor()
+        # 실행 한 번 동안 하나의 API 클라이언트(HTTP 연결 풀)와 파일 처리기를 공유
+        # (비동기 잠금과 연결 풀은 실행마다 새 이벤트 루프에 묶이므로 run()마다 새로 생성)
+        comment_generator = CommentGenerator(self.config)
+        processor = FileProcessor(self.config, JavaParser(), comment_generator)
         
-        success_count = 0
-        error_count = 0
+        # 백업은 주석 생성과 동시에 진행하고, 파일을 덮어쓰기 전에만 완료를 기다림
+        backup_project = None
+        if not dry_run and not no_backup:
+            print(f"{_CYAN}💾 백업 생성 중... (주석 생성과 동시에 진행){_RESET}")
+            backup_project = project_path
+        
+        # 파일 처리 - 여러 파일을 동시에 처리하고 끝나는 순서대로 진행 상황 갱신
+        print(f"{_CYAN}🤖 주석 생성 및 적용 중...{_RESET}")
+        
+        # 파일이 많으면 요청을 Message Batches 작업으로 모아 먼저 처리 (비용 절감)
+        use_batch = structure['total_files'] >= self.config.BATCH_THRESHOLD
+        if use_batch:
+            print(f"{_CYAN}📦 배치 모드: 요청을 Message Batches 작업으로 제출합니다.{_RESET}")
+        batch_pbar = None
+        
+        def on_batch_progress(request_counts: dict) -> None:
+            nonlocal batch_pbar
+            if batch_pbar is None:
+                batch_pbar = tqdm(total=sum(request_counts.values()), desc="Batch")
+            done = sum(count for name, count in request_counts.items() if name != 'processing')
+            batch_pbar.set_postfix(
+                succeeded=request_counts.get('succeeded', 0),
+                processing=request_counts.get('processing', 0)
+            )
+            batch_pbar.update(done - batch_pbar.n)
         
         with tqdm(total=structure['total_files'], desc="Processing") as pbar:
-            for file_path in structure['all_files']:
-                pbar.set_description(f"Processing {file_path.name}")
-                
-                if processor.process_java_file(file_path, dry_run=dry_run):
-                    success_count += 1
-                else:
-                    error_count += 1
-                
+            def on_done(file_path: str, success: bool) -> None:
                 pbar.update(1)
+                # 파일 이름 표시는 16개마다 한 번만 갱신
+                if pbar.n % 16 == 0:
+                    pbar.set_postfix_str(os.path.basename(file_path), refresh=False)
+            
+            try:
+                success_count, error_count, backup_error = asyncio.run(process_files(
+                    processor, comment_generator, structure['all_files'],
+                    dry_run=dry_run, on_done=on_done,
+                    use_batch=use_batch, on_batch_progress=on_batch_progress,
+                    backup_project=backup_project
+                ))
+            finally:
+                if batch_pbar is not None:
+                    batch_pbar.close()
+        
+        if backup_error is not None:
+            # 백업이 실패하면 파일 저장이 모두 백업 완료를 기다리다 실패하므로 파일은 하나도 덮어쓰지 않음
+            print(f"\n{_RED}❌ 백업 중 오류가 발생해 파일을 수정하지 않았습니다: {backup_error}{_RESET}")
+            return
+        
+        if backup_project is not None:
+            backup_path = processor.get_backup_path(project_path)
+            print(f"{_GREEN}✅ 백업 완료: {backup_path}{_RESET}")
         
         # 결과 출력
-        print(f"\n{Fore.GREEN}🎉 작업 완료!{Style.RESET_ALL}")
+        print(f"\n{_GREEN}🎉 작업 완료!{_RESET}")
         print(f"   ✅ 성공: {success_count}개 파일")
         if error_count > 0:
             print(f"   ❌ 실패: {error_count}개 파일")
         
         if not dry_run and not no_backup:
-            print(f"\n{Fore.CYAN}💡 팁:{Style.RESET_ALL}")
+            print(f"\n{_CYAN}💡 팁:{_RESET}")
             print(f"   📁 백업 폴더: {backup_path}")
             print(f"   🔄 롤백하려면: rm -rf {project_path}/* && cp -r {backup_path}/* {project_path}/")
 
+async def process_files(file_processor, comment_generator, java_files, dry_run=False, on_done=None,
+                        use_batch=False, on_batch_progress=None, backup_project=None):
+    """파일 처리 후 API 클라이언트의 연결 풀 정리 - (성공 수, 실패 수, 백업 중 발생한 예외) 반환
+
+    use_batch이면 모든 요청을 Message Batches 작업으로 먼저 처리한 뒤 파일에 적용한다.
+    backup_project가 있으면 백업을 별도 스레드에서 동시에 진행하고, 파일 저장은 백업이 끝난 뒤에만 한다.
+    """
+    backup = None
+    if backup_project is not None:
+        backup = asyncio.get_running_loop().run_in_executor(None, file_processor.create_backup, backup_project)
+        file_processor.write_gate = backup
+    try:
+        if use_batch:
+            await file_processor.prefetch_comments(java_files, on_batch_progress)
+        success_count, error_count = await file_processor.process_java_files(
+            java_files, dry_run=dry_run, on_done=on_done
+        )
+        backup_error = None
+        if backup is not None:
+            # 저장할 파일이 없었더라도 백업이 끝날 때까지 기다리고, 실패는 처리 오류와 구분해 호출한 쪽에 알림
+            await asyncio.wait([backup])
+            backup_error = backup.exception()
+        return success_count, error_count, backup_error
+    finally:
+        file_processor.write_gate = None
+        await comment_generator.aclose()
+
 def main():
     # 명령줄 인자 파싱
     parser = argparse.ArgumentParser(
@@ -106,36 +177,36 @@ def main():
         action='store_true',
         help='실제 파일 변경 없이 미리보기만 수행'
     )
+    parser.add_argument(
+        '--no-backup',
+        action='store_true',
+        help='백업 없이 실행'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='캐시된 응답을 사용하지 않고 항상 API 호출'
+    )
+    parser.add_argument(
+        '--debug',
+        action='store_true',
+        help='상세 디버깅 로그 출력'
+    )
     args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.WARNING,
+        format='%(message)s'
+    )
 
     # 설정 초기화
     config = Config()
-    config.PROJECT_ROOT = str(Path(args.project_path).resolve())
-    config.BACKUP_DIR = os.path.join(config.PROJECT_ROOT, 'backup_before_comments')
-    
-    # 컴포넌트 초기화
-    parser = JavaParser()
-    comment_generator = CommentGenerator(config)
-    file_processor = FileProcessor(config, parser, comment_generator)
-    project_scanner = ProjectScanner(config)
+    config.USE_RESPONSE_CACHE = not args.no_cache
+    config.USE_FILE_CACHE = not args.no_cache
+    config.USE_SCAN_CACHE = not args.no_cache
+    config.DEBUG = args.debug
     
-    try:
-        # Java 파일 스캔
-        java_files = project_scanner.scan_java_files()
-        if not java_files:
-            print("처리할 Java 파일을 찾을 수 없습니다.")
-            return
-            
-        print(f"총 {len(java_files)}개의 Java 파일을 찾았습니다.")
-        
-        # 파일 처리
-        file_processor.process_java_files(java_files)
-        
-        print("\n모든 파일 처리가 완료되었습니다.")
-        
-    except Exception as e:
-        print(f"\n❌ 예상치 못한 오류가 발생했습니다: {e}")
-        raise
+    JavaCodeCommentator(config).run(args.project_path, dry_run=args.dry_run, no_backup=args.no_backup)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,140 @@
+import anthropic
+import asyncio
+import httpx
+import json
+import logging
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 재시도할 HTTP 상태 코드 (429는 RateLimitError로 따로 처리)
+RETRYABLE_STATUS_CODES = {408, 500, 502, 503, 504, 529}
+
+class MessageBatches:
+    """Anthropic Message Batches API로 많은 요청을 한 번에 비동기 처리하는 클라이언트
+
+    사용 중인 SDK(0.18.1)에는 batches 리소스가 없으므로 클라이언트의 저수준 get/post로 직접 호출한다.
+    """
+
+    def __init__(self, client, config, max_retries: int,
+                 retry_wait: Callable[[anthropic.APIError, int], float]):
+        self.client = client
+        self.config = config
+        # 클라이언트는 SDK 자체 재시도를 끈 상태이므로 일시적인 오류는 _request에서 직접 재시도
+        self.max_retries = max_retries
+        self.retry_wait = retry_wait
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """배치 API 요청 - 429, 5xx, 연결 오류는 대기 후 재시도하고 재시도를 모두 소진하면 예외 전달"""
+        for attempt in range(self.max_retries):
+            try:
+                return await getattr(self.client, method)(path, cast_to=httpx.Response, **kwargs)
+            except anthropic.APIStatusError as e:
+                retryable = isinstance(e, anthropic.RateLimitError) or e.status_code in RETRYABLE_STATUS_CODES
+                if not retryable or attempt == self.max_retries - 1:
+                    raise
+                error = e
+            except anthropic.APIConnectionError as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                error = e
+            wait_time = self.retry_wait(error, attempt)
+            logger.warning("배치 API 오류 발생 (시도 %d/%d), %.1f초 후 재시도합니다: %s",
+                           attempt + 1, self.max_retries, wait_time, error)
+            await asyncio.sleep(wait_time)
+
+    async def create(self, requests: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """배치 작업 생성 (custom_id -> messages.create 파라미터)"""
+        response = await self._request(
+            'post',
+            '/v1/messages/batches',
+            body={
+                'requests': [
+                    {'custom_id': custom_id, 'params': params}
+                    for custom_id, params in requests.items()
+                ]
+            }
+        )
+        return response.json()
+
+    async def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        """배치 작업 상태 조회"""
+        response = await self._request('get', f'/v1/messages/batches/{batch_id}')
+        return response.json()
+
+    async def cancel(self, batch_id: str) -> Dict[str, Any]:
+        """배치 작업 취소 요청 (이미 처리된 요청의 결과는 그대로 남음)"""
+        response = await self._request('post', f'/v1/messages/batches/{batch_id}/cancel')
+        return response.json()
+
+    async def results(self, batch_id: str) -> Dict[str, str]:
+        """끝난 배치 작업의 결과를 {custom_id: 응답 텍스트}로 반환 (실패한 요청은 제외)"""
+        response = await self._request('get', f'/v1/messages/batches/{batch_id}/results')
+
+        texts = {}
+        for line in response.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            result = item.get('result', {})
+            if result.get('type') != 'succeeded':
+                logger.warning("배치 요청 실패 (%s): %s", item.get('custom_id'), result.get('type'))
+                continue
+            texts[item['custom_id']] = ''.join(
+                block.get('text', '') for block in result['message'].get('content', [])
+            )
+        return texts
+
+    async def run(self, requests: Dict[str, Dict[str, Any]],
+                  on_progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, str]:
+        """요청들을 배치 작업으로 제출하고 모두 끝날 때까지 기다린 뒤 결과 반환
+
+        on_progress는 상태를 조회할 때마다 전체 작업의 request_counts 합계로 호출된다.
+        중간에 포기하면(오류, 취소) 아직 끝나지 않은 배치 작업을 취소한 뒤 예외를 그대로 전달한다.
+        """
+        items = list(requests.items())
+        size = self.config.BATCH_MAX_REQUESTS
+        batch_ids = []
+        pending = set()
+        try:
+            for i in range(0, len(items), size):
+                batch = await self.create(dict(items[i:i + size]))
+                batch_ids.append(batch['id'])
+                pending.add(batch['id'])
+
+            # 끝날 때까지 간격을 늘려 가며 상태 조회
+            request_counts = {}
+            wait_time = self.config.BATCH_POLL_INTERVAL
+            while pending:
+                await asyncio.sleep(wait_time)
+                for batch_id in list(pending):
+                    batch = await self.retrieve(batch_id)
+                    request_counts[batch_id] = batch.get('request_counts', {})
+                    if batch.get('processing_status') == 'ended':
+                        pending.discard(batch_id)
+
+                if on_progress is not None:
+                    totals = {}
+                    for counts in request_counts.values():
+                        for name, count in counts.items():
+                            totals[name] = totals.get(name, 0) + count
+                    on_progress(totals)
+                wait_time = min(wait_time * 2, self.config.BATCH_POLL_MAX_INTERVAL)
+        except BaseException:
+            # 제출한 작업이 계속 처리(과금)된 뒤 같은 요청을 개별로 다시 보내지 않도록 취소
+            await self._cancel_all(pending)
+            raise
+
+        results = {}
+        for batch_id in batch_ids:
+            results.update(await self.results(batch_id))
+        return results
+
+    async def _cancel_all(self, batch_ids) -> None:
+        """배치 작업들을 취소 (취소 실패는 경고만 남김)"""
+        for batch_id in batch_ids:
+            try:
+                await self.cancel(batch_id)
+                logger.warning("배치 작업을 취소했습니다: %s", batch_id)
+            except anthropic.APIError as e:
+                logger.warning("배치 작업 취소 실패 (%s): %s", batch_id, e)
@@ -1,44 +1,189 @@
+import functools
+import json
+import logging
 import os
+import tempfile
+import time
+from collections import defaultdict, deque
 from pathlib import Path
-from typing import List
-from config import Config
+from typing import Any, Callable, FrozenSet, Iterator, List, Optional, Tuple
+import pathspec
+from config import DEFAULT_BACKUP_DIR, Config
+
+logger = logging.getLogger(__name__)
+
+# 디렉토리 목록 캐시 (프로젝트의 FILE_CACHE_DIR 안에 저장)
+SCAN_CACHE_FILE = 'scan.json'
+SCAN_CACHE_VERSION = 3
+# 이 시간 안에 수정된 디렉토리는 수정 시각만으로 변경 여부를 판단하기 어려우므로 캐시하지 않음
+SCAN_CACHE_MTIME_SLACK_NS = 2_000_000_000
+
+@functools.lru_cache(maxsize=None)
+def _compile_ignore_patterns(patterns: Tuple[str, ...]) -> Tuple[FrozenSet[str], Optional[Callable[[str], Any]]]:
+    """무시 패턴을 (이름 집합, glob 검사 함수)로 변환 - 같은 패턴 목록은 스캐너끼리 결과를 공유
+
+    glob 검사 함수는 프로젝트 기준 상대 경로('/' 구분, 디렉토리는 '/'로 끝남)를 받아 해당하면 참인 값을 반환한다.
+    glob 패턴은 pathspec으로 gitignore 규칙에 따라 검사한다.
+    """
+    glob_patterns = [p for p in patterns if any(c in p for c in '/*?[')]
+    names = frozenset(p for p in patterns if p not in glob_patterns)
+    if not glob_patterns:
+        return names, None
+    return names, pathspec.GitIgnoreSpec.from_lines(glob_patterns).match_file
 
 class ProjectScanner:
     def __init__(self, config: Config):
         """프로젝트 스캐너 초기화"""
         self.config = config
         self.project_path = Path(config.PROJECT_ROOT)
+        # 무시 패턴은 이름 집합과 glob 검사 함수로 한 번만 변환
+        self._ignore_names, self._ignore_match = _compile_ignore_patterns(tuple(config.IGNORE_PATTERNS))
+        # 확장자는 튜플로 한 번 만들어 두고 str.endswith 한 번으로 모두 검사
+        self._extensions = tuple(config.JAVA_EXTENSIONS)
+        # 이 도구가 프로젝트 안에 만드는 백업/캐시 디렉토리 (설정된 이름과 위치를 따름)
+        self._tool_dirs = frozenset(
+            os.path.normpath(self.project_path / name)
+            for name in (config.BACKUP_DIR or DEFAULT_BACKUP_DIR, config.FILE_CACHE_DIR)
+        )
+        # 마지막 스캔에서 바뀌었지만 아직 저장하지 않은 디렉토리 목록
+        self._unsaved_listings = None
     
     def scan_java_files(self) -> List[str]:
         """Java 파일 스캔"""
-        java_files = []
+        return [file_path for file_path, _ in self.iter_java_files()]
+    
+    def iter_java_files(self) -> Iterator[Tuple[str, str]]:
+        """Java 파일 경로와 패키지 디렉토리(프로젝트 기준 상대 경로)를 순회하며 반환
+
+        디렉토리 목록은 수정 시각과 함께 캐시해 두고, 수정 시각이 그대로인 디렉토리는 다시 읽지 않는다.
+        바뀐 목록은 save_scan_cache를 호출해야 저장된다.
+        """
+        cached = self._load_scan_cache()
+        listings = {}
+        changed = False
+        # 방금 수정된 디렉토리는 같은 시각 안에 또 바뀔 수 있으므로 캐시를 믿지 않도록 표시
+        trusted_before = time.time_ns() - SCAN_CACHE_MTIME_SLACK_NS
         
-        # 프로젝트 디렉토리 순회
-        for ext in self.config.JAVA_EXTENSIONS:
-            java_files.extend(
-                str(f) for f in self.project_path.rglob(f"*{ext}")
-                if not any(ignore in str(f) for ignore in self.config.IGNORE_PATTERNS)
-            )
+        # 상대 경로는 내려갈 때마다 이어 붙여서 파일마다 다시 계산하지 않음
+        pending = deque([(str(self.project_path), '.')])
+        while pending:
+            directory, package_dir = pending.pop()
+            prefix = '' if package_dir == '.' else package_dir + os.sep
             
-        return java_files
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+                listing = cached.get(package_dir)
+                if listing is None or listing['mtime_ns'] != mtime:
+                    listing = self._scan_directory(directory, prefix)
+                    listing['mtime_ns'] = mtime if mtime < trusted_before else None
+                    changed = True
+            except OSError as e:
+                # 읽을 수 없는 디렉토리(권한 없음 등)는 하위 트리 전체를 건너뜀
+                logger.warning("디렉토리를 읽을 수 없어 건너뜁니다 (%s): %s", directory, e)
+                continue
+            listings[package_dir] = listing
+            
+            for name in listing['dirs']:
+                pending.append((os.path.join(directory, name), prefix + name))
+            for name in listing['files']:
+                yield os.path.join(directory, name), package_dir
+        
+        self._unsaved_listings = listings if changed or len(listings) != len(cached) else None
+    
+    def save_scan_cache(self) -> None:
+        """마지막 스캔의 디렉토리 목록을 프로젝트의 캐시 디렉토리에 저장 (바뀐 것이 없으면 아무것도 하지 않음)
+
+        취소하거나 dry-run으로 실행할 때 프로젝트에 파일이 생기지 않도록 실제로 파일을 수정하기로 한 뒤에 호출한다.
+        """
+        if self._unsaved_listings is not None:
+            self._save_scan_cache(self._unsaved_listings)
+            self._unsaved_listings = None
+    
+    def _scan_directory(self, directory: str, prefix: str) -> dict:
+        """디렉토리 하나를 os.scandir로 읽어 하위 디렉토리와 Java 파일 이름 목록 반환
+
+        무시할 디렉토리는 목록에서 빠지므로 하위 트리 전체를 건너뛴다.
+        """
+        dirs = []
+        files = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name in self._ignore_names:
+                    continue
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.name.endswith(self._extensions):
+                    continue
+                if is_dir and os.path.normpath(entry.path) in self._tool_dirs:
+                    continue
+                # 디렉토리는 끝에 '/'를 붙여 검사해 'generated/' 같은 디렉토리 패턴이면 하위 트리 전체를 건너뜀
+                if self._is_ignored(prefix + entry.name + ('/' if is_dir else '')):
+                    continue
+                (dirs if is_dir else files).append(entry.name)
+        return {'dirs': dirs, 'files': files}
+    
+    def _scan_cache_path(self) -> Optional[Path]:
+        if not self.config.USE_SCAN_CACHE:
+            return None
+        return self.project_path / self.config.FILE_CACHE_DIR / SCAN_CACHE_FILE
+    
+    def _scan_cache_signature(self) -> dict:
+        """캐시된 목록이 유효한 조건 (무시 패턴, 확장자, 백업/캐시 디렉토리가 같아야 함)"""
+        return {
+            'version': SCAN_CACHE_VERSION,
+            'ignore_patterns': list(self.config.IGNORE_PATTERNS),
+            'extensions': list(self._extensions),
+            'tool_dirs': sorted(self._tool_dirs)
+        }
+    
+    def _load_scan_cache(self) -> dict:
+        """저장된 디렉토리 목록 반환 (없거나 조건이 다르면 빈 dict)"""
+        path = self._scan_cache_path()
+        if path is None:
+            return {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get('signature') != self._scan_cache_signature():
+            return {}
+        return data.get('listings', {})
+    
+    def _save_scan_cache(self, listings: dict) -> None:
+        """디렉토리 목록 저장 (임시 파일에 쓴 뒤 교체) - 실패해도 스캔 결과에는 영향 없음"""
+        path = self._scan_cache_path()
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'signature': self._scan_cache_signature(), 'listings': listings}, f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning("스캔 캐시 저장 실패 (%s): %s", path, e)
+    
+    def _is_ignored(self, relative_path: str) -> bool:
+        """상대 경로가 glob 무시 패턴에 해당하는지 확인"""
+        if self._ignore_match is None:
+            return False
+        return bool(self._ignore_match(relative_path.replace(os.sep, '/')))
     
     def get_project_structure(self) -> dict:
         """프로젝트 구조 정보 반환"""
-        java_files = self.scan_java_files()
+        java_files = []
+        files_by_package = defaultdict(list)
+        
+        for file_path, package_dir in self.iter_java_files():
+            java_files.append(file_path)
+            files_by_package[package_dir].append(file_path)
         
-        structure = {
+        return {
             'total_files': len(java_files),
-            'files_by_package': {},
+            'files_by_package': dict(files_by_package),
             'all_files': java_files
         }
-        
-        for file_path in java_files:
-            relative_path = Path(file_path).relative_to(self.project_path)
-            package_dir = str(relative_path.parent)
-            
-            if package_dir not in structure['files_by_package']:
-                structure['files_by_package'][package_dir] = []
-            
-            structure['files_by_package'][package_dir].append(file_path)
-        
-        return structure
\ No newline at end of file
@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+class TokenBucket:
+    """초당 요청 수를 제한하는 비동기 토큰 버킷"""
+
+    def __init__(self, tokens_per_second: float, max_tokens: int):
+        self.tokens_per_second = tokens_per_second
+        self.max_tokens = max_tokens
+        self.tokens = float(max_tokens)
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        """경과 시간만큼 토큰 보충"""
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.tokens = min(self.max_tokens, self.tokens + elapsed * self.tokens_per_second)
+        self.updated_at = now
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """토큰을 얻을 때까지 대기 (먼저 요청한 순서대로 처리)"""
+        async with self.lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.tokens_per_second)
+                self._refill()
+            self.tokens -= tokens
@@ -0,0 +1,79 @@
+import functools
+import hashlib
+import os
+import sqlite3
+from typing import Callable, Optional
+
+class ResponseCache:
+    """프롬프트 해시를 키로 Claude 응답을 저장하는 디스크 캐시"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        # 여러 실행이 동시에 같은 캐시 파일을 읽고 쓸 수 있도록 WAL 모드 사용
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, '
+            'response TEXT NOT NULL)'
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """요청을 구성하는 값들로 SHA-256 캐시 키 생성"""
+        data = '\0'.join(str(part) for part in parts)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """캐시된 응답 반환 (없으면 None)"""
+        row = self.conn.execute(
+            'SELECT response FROM responses WHERE key = ?', (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, response: str) -> None:
+        """응답 저장 (한 트랜잭션으로 기록)"""
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses (key, response) VALUES (?, ?)',
+                (key, response)
+            )
+
+    def close(self) -> None:
+        """캐시 연결 종료"""
+        self.conn.close()
+
+def cached_response(func):
+    """동일한 요청의 응답이 캐시에 있으면 API 호출 없이 반환하는 데코레이터
+
+    is_valid가 주어지면 그 검사를 통과한 응답만 캐시에서 사용하고 저장한다.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, system_prompt: str, prompt: str, max_tokens: int = None, *args,
+                      is_valid: Optional[Callable[[str], bool]] = None, **kwargs):
+        def usable(response: Optional[str]) -> bool:
+            return response is not None and (is_valid is None or is_valid(response))
+
+        key = self._cache_key(system_prompt, prompt, max_tokens)
+        # 배치로 미리 받아 둔 응답 우선 사용
+        response = self.prefetched.get(key)
+        if usable(response):
+            return response
+
+        cache = self.response_cache
+        if cache is None:
+            return await func(self, system_prompt, prompt, max_tokens, *args, **kwargs)
+
+        response = cache.get(key)
+        if usable(response):
+            return response
+
+        response = await func(self, system_prompt, prompt, max_tokens, *args, **kwargs)
+        # 실패한 호출(None)이나 검사를 통과하지 못한 응답은 저장하지 않음
+        if usable(response):
+            cache.set(key, response)
+        return response
+
+    return wrapper